@@ -0,0 +1,71 @@
+"""
+Mede o tempo de inicialização de script.py com `python -X importtime` e verifica o orçamento.
+
+Importar script.py não deve carregar openai, paramiko, Pillow, selenium, aiohttp nem Django:
+eles só são importados pelas etapas que os usam.
+
+Uso:
+    python bench_startup.py
+    python bench_startup.py --runs 10 --budget-ms 150 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ('openai', 'paramiko', 'PIL', 'selenium', 'aiohttp', 'django')
+
+
+def measure_import(module='script'):
+    """
+    Importa o módulo num interpretador novo com -X importtime.
+
+    :return: (tempo cumulativo do módulo em ms, {módulo: tempo próprio em ms}, módulos pesados carregados)
+    """
+    check = f"import sys, {module}; print(','.join(sorted({{name.split('.')[0] for name in sys.modules}})))"
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', check],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True,
+    )
+    self_times = {}
+    cumulative = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        self_times[name] = int(self_us) / 1000
+        if name == module:
+            cumulative = int(cumulative_us) / 1000
+    loaded = set(result.stdout.strip().split(','))
+    return cumulative, self_times, sorted(loaded.intersection(HEAVY_MODULES))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Orçamento de tempo de importação de script.py.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('STARTUP_BUDGET_MS', '150')))
+    parser.add_argument('--top', type=int, default=10, help="Módulos mais lentos a listar")
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(max(1, args.runs)):
+        cumulative, self_times, heavy = measure_import()
+        samples.append(cumulative)
+
+    median = statistics.median(samples)
+    print(f"import script: mediana {median:.1f} ms, mínimo {min(samples):.1f} ms em {len(samples)} execuções")
+    print("Módulos mais lentos (última execução, tempo próprio):")
+    for name, ms in sorted(self_times.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    failures = []
+    if heavy:
+        failures.append(f"dependências pesadas carregadas na importação: {', '.join(heavy)}")
+    if median > args.budget_ms:
+        failures.append(f"mediana {median:.1f} ms acima do orçamento de {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FALHA: {failure}")
+    sys.exit(1 if failures else 0)
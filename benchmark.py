@@ -0,0 +1,191 @@
+"""
+Benchmark offline de script.py: executa posts completos contra os stubs locais de stub_servers.py
+(OpenAI, GetIMG, SFTP, Django e Pinterest API), sem custo e sem acesso à internet.
+
+Mostra posts por minuto, latência por etapa (p50/p95, do rastreamento de script.py) e memória.
+As variáveis de ambiente de ajuste (POST_CONCURRENCY, IMAGE_PIPELINE, UPLOAD_MODE, WEBP_PRESET,
+DJANGO_BATCH_SIZE...) valem normalmente, para comparar configurações.
+
+Uso:
+    python benchmark.py --posts 6
+    python benchmark.py --mode blog --posts 3 --openai-latency 0.5 --getimg-latency 2 --malformed-rate 0.1
+    POST_CONCURRENCY=6 UPLOAD_MODE=batch python benchmark.py --posts 12 --json resultado.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import stub_servers
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def configure_environment(stubs, workdir):
+    """Aponta script.py para os stubs. Precisa rodar antes de importar script (constantes lidas na importação)."""
+    openai_stub, getimg_stub, sftp_stub, django_stub, pinterest_stub = stubs
+    os.environ.update({
+        'HOME': workdir,  # ~/media e caches ficam no diretório temporário
+        'OPENAI_KEY': 'stub',
+        'OPENAI_API_BASE': f"{openai_stub.url}/v1",
+        'GETIMG_KEY': 'stub',
+        'GETIMG_URL': f"{getimg_stub.url}/v1/flux-schnell/text-to-image",
+        'SFTP_SERVER': sftp_stub.host,
+        'SFTP_PORT': str(sftp_stub.port),
+        'SFTP_USERNAME': sftp_stub.username,
+        'SFTP_PASSWORD': sftp_stub.password,
+        'DJANGO_API_URL': f"{django_stub.url}/api",
+        'DJANGO_API_TOKEN': 'stub',
+        'PINTEREST_BACKEND': 'api',
+        'PINTEREST_API_URL': f"{pinterest_stub.url}/v5",
+        'PINTEREST_API_TOKEN': 'stub',
+        'MEDIA_BASE_URL': '',
+        'PIN_MIN_INTERVAL': '0',
+        'PIN_INTERVAL_JITTER': '0',
+        # Sem reaproveitar execuções anteriores: cada rodada mede o trabalho completo
+        'JOURNAL': '0',
+        'COMPLETION_CACHE': 'off',
+        'IMAGE_CACHE': '0',
+        'THEME_CACHE_FILE': '',
+    })
+
+
+def run_blog_mode(script, theme, posts):
+    """Chama generate_blog_title + publish_and_generate_blog em sequência, sem Pinterest."""
+    created = 0
+    try:
+        for n in range(1, posts + 1):
+            print(f"Post {n} de {posts}")
+            with script.trace_span('post', post=script.new_trace_id()) as span:
+                title = script.generate_blog_title(theme)
+                result = script.publish_and_generate_blog(title, theme, None, None) if title else None
+                span['ok'] = result is not None
+            created += result is not None
+    finally:
+        script.close_django_batcher()
+        script.close_sftp_pools()
+        script.print_http_stats()
+        script.print_trace_summary()
+    return created
+
+
+def stage_report(script):
+    """Latência por etapa a partir das etapas registradas por script.trace_span."""
+    by_stage = {}
+    for span in script._trace_spans:
+        by_stage.setdefault(span['stage'], []).append(span)
+    report = {}
+    for stage, spans in by_stage.items():
+        walls = sorted(span['wall'] for span in spans)
+        report[stage] = {
+            'count': len(walls),
+            'p50': script.percentile(walls, 50),
+            'p95': script.percentile(walls, 95),
+            'max': walls[-1],
+            'failed': sum(1 for span in spans if not span['ok']),
+            'retries': sum(span['retries'] for span in spans),
+        }
+    return report
+
+
+def max_rss_mb(who):
+    """Pico de memória residente (MB) do processo ou dos filhos (pool de conversão WebP)."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(who)
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline de script.py com APIs simuladas.")
+    parser.add_argument('--mode', choices=('main', 'blog'), default='main',
+                        help="main: main(theme, x) com Pinterest; blog: publish_and_generate_blog em sequência")
+    parser.add_argument('--posts', type=int, default=4)
+    parser.add_argument('--theme', default='christmas decor ideas')
+    parser.add_argument('--concurrency', type=int, help="POST_CONCURRENCY (padrão: o do ambiente)")
+    parser.add_argument('--openai-latency', type=float, default=0.2)
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="Fração de respostas do GPT fora das regras")
+    parser.add_argument('--getimg-latency', type=float, default=0.5)
+    parser.add_argument('--sftp-latency', type=float, default=0.0)
+    parser.add_argument('--django-latency', type=float, default=0.1)
+    parser.add_argument('--pinterest-latency', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--tracemalloc', action='store_true', help="Mede também o pico de alocações Python (mais lento)")
+    parser.add_argument('--json', help="Grava o relatório neste arquivo")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='blog-benchmark-')
+    stubs = (
+        stub_servers.OpenAIStub(latency=args.openai_latency, malformed_rate=args.malformed_rate, seed=args.seed),
+        stub_servers.GetIMGStub(latency=args.getimg_latency),
+        stub_servers.SFTPStub(latency=args.sftp_latency, root=os.path.join(workdir, 'sftp')),
+        stub_servers.DjangoAPIStub(latency=args.django_latency),
+        stub_servers.PinterestAPIStub(latency=args.pinterest_latency),
+    )
+    for stub in stubs:
+        stub.start()
+    configure_environment(stubs, workdir)
+    if args.concurrency is not None:
+        os.environ['POST_CONCURRENCY'] = str(args.concurrency)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    started = time.perf_counter()
+    import script  # noqa: E402 - depois do ambiente apontar para os stubs
+    import_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    try:
+        if args.mode == 'main':
+            script.main(args.theme, args.posts)
+            created = sum(1 for span in script._trace_spans if span['stage'] == 'post' and span['ok'])
+        else:
+            created = run_blog_mode(script, args.theme, args.posts)
+    finally:
+        elapsed = time.perf_counter() - started
+        for stub in stubs:
+            stub.stop()
+
+    openai_stub, getimg_stub, sftp_stub, django_stub, pinterest_stub = stubs
+    report = {
+        'mode': args.mode,
+        'posts_requested': args.posts,
+        'posts_created': created,
+        'seconds': elapsed,
+        'posts_per_minute': created / elapsed * 60 if elapsed > 0 else 0.0,
+        'import_seconds': import_seconds,
+        'stages': stage_report(script),
+        'requests': {
+            'openai_completions': openai_stub.completions,
+            'openai_malformed': openai_stub.malformed,
+            'getimg_images': getimg_stub.generated,
+            'sftp_uploads': len(sftp_stub.uploads),
+            'sftp_bytes': sum(size for _, size in sftp_stub.uploads),
+            'django_posts': len(django_stub.posts),
+            'django_batches': len(django_stub.batches),
+            'pins': len(pinterest_stub.pins),
+        },
+        'memory_mb': {
+            'max_rss': max_rss_mb(resource.RUSAGE_SELF) if resource else None,
+            'max_rss_children': max_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+            'python_peak': tracemalloc.get_traced_memory()[1] / (1024 * 1024) if args.tracemalloc else None,
+        },
+    }
+
+    print()
+    print(f"Modo {args.mode}: {created} de {args.posts} posts em {elapsed:.1f}s = {report['posts_per_minute']:.1f} posts/min")
+    print("Requisições: " + ", ".join(f"{name}={value}" for name, value in report['requests'].items()))
+    print("Memória (MB): " + ", ".join(
+        f"{name}={value:.1f}" for name, value in report['memory_mb'].items() if value is not None
+    ))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Relatório gravado em {args.json}")
@@ -0,0 +1,57 @@
+"""
+Confere se script.slugify gera os mesmos slugs que django.utils.text.slugify.
+
+As saídas esperadas foram tiradas do Django (allow_unicode=False) e ficam fixas aqui, então a
+verificação continua valendo sem o Django instalado. Quando ele estiver disponível, cada entrada
+também é comparada com a função original.
+
+Uso:
+    python check_slugify.py
+"""
+import sys
+
+from script import slugify
+
+CASES = (
+    ('Decoração de Natal', 'decoracao-de-natal'),
+    ('CAFÉ com Pão', 'cafe-com-pao'),
+    ('jalapeño_picante-Ñ', 'jalapeno_picante-n'),
+    ('Straße Ærø', 'strae-r'),
+    ('ﬁnal ½ preço', 'final-12-preco'),
+    ('  Ação & Reação!  ', 'acao-reacao'),
+    ('Dicas: 10% OFF (hoje)!!!', 'dicas-10-off-hoje'),
+    ('C++ & C#', 'c-c'),
+    ('Olá, Mundo! 👋', 'ola-mundo'),
+    ('a - b — c', 'a-b-c'),
+    ('São  João\t2024', 'sao-joao-2024'),
+    ('--Receitas--Fáceis--', 'receitas-faceis'),
+    ('__meio_termo__', 'meio_termo'),
+    ('-_-', ''),
+    ('', ''),
+)
+
+
+def django_slugify():
+    """Devolve django.utils.text.slugify, ou None quando o Django não está instalado."""
+    try:
+        from django.utils.text import slugify as reference
+    except ImportError:
+        return None
+    return reference
+
+
+if __name__ == "__main__":
+    reference = django_slugify()
+    failures = []
+    for value, expected in CASES:
+        got = slugify(value)
+        if got != expected:
+            failures.append(f"slugify({value!r}) = {got!r}, esperado {expected!r}")
+        if reference is not None and got != reference(value):
+            failures.append(f"slugify({value!r}) = {got!r}, Django gera {reference(value)!r}")
+
+    source = "saídas fixas e Django" if reference is not None else "saídas fixas (Django não instalado)"
+    print(f"{len(CASES)} entradas conferidas contra {source}")
+    for failure in failures:
+        print(f"FALHA: {failure}")
+    sys.exit(1 if failures else 0)
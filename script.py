@@ -1,38 +1,860 @@
+import asyncio
+import base64
+import contextvars
+import functools
+import hashlib
+import importlib
 import io
 import json
+import multiprocessing
 import os
+import posixpath
+import queue
 import random
 import re
+import shutil
+import sqlite3
+import sys
+import threading
 import time
 import traceback
+import unicodedata
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-import openai
-import paramiko
+from urllib.parse import quote, urlsplit
 import requests
-from django.utils.text import slugify
-from PIL import Image
-from selenium import webdriver
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
+
+class LazyImport:
+    """
+    Adia o import de um módulo (ou de um atributo dele) até o primeiro uso.
+
+    openai, paramiko, Pillow, selenium e aiohttp levam centenas de milissegundos para carregar;
+    assim só são importados pelas etapas que os usam.
+    """
+
+    def __init__(self, module_name, attribute=None, on_load=None):
+        self._module_name = module_name
+        self._attribute = attribute
+        self._on_load = on_load
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            module = importlib.import_module(self._module_name)
+            if self._on_load is not None:
+                self._on_load(module)
+            self._target = getattr(module, self._attribute) if self._attribute else module
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+
 load_dotenv()
 
+aiohttp = LazyImport('aiohttp')
+openai = LazyImport('openai', on_load=lambda module: setattr(module, 'api_key', os.getenv('OPENAI_KEY')))
+paramiko = LazyImport('paramiko')
+Image = LazyImport('PIL.Image')
+webdriver = LazyImport('selenium.webdriver')
+ActionChains = LazyImport('selenium.webdriver.common.action_chains', 'ActionChains')
+By = LazyImport('selenium.webdriver.common.by', 'By')
+Keys = LazyImport('selenium.webdriver.common.keys', 'Keys')
+EC = LazyImport('selenium.webdriver.support.expected_conditions')
+WebDriverWait = LazyImport('selenium.webdriver.support.ui', 'WebDriverWait')
+
 # Configurações de API
-openai.api_key = os.getenv('OPENAI_KEY')
 GETIMG_API_KEY = os.getenv('GETIMG_KEY')
 pinterest_email = os.getenv('PINTEREST_EMAIL')
 pinterest_password = os.getenv('PINTEREST_PASSWORD')
+DJANGO_API_TOKEN = os.getenv('DJANGO_API_TOKEN', '1fbca8225f25f61a50abf42fb7a14518b25587ac')
+DJANGO_API_URL = os.getenv('DJANGO_API_URL', 'https://www.dailydecorideas.com/api').rstrip('/')
+
+# Publicação em lote no Django: posts por requisição (1 = um POST por post) e espera máxima para completar o lote
+DJANGO_BATCH_SIZE = int(os.getenv('DJANGO_BATCH_SIZE', '1'))
+DJANGO_BATCH_WAIT = float(os.getenv('DJANGO_BATCH_WAIT', '10'))
+
+# Número máximo de requisições simultâneas ao GPT ao gerar ideias (1 = sequencial)
+IDEAS_CONCURRENCY = int(os.getenv('IDEAS_CONCURRENCY', '4'))
+
+# Envia cada ideia para a geração de imagens assim que ela é analisada, sem esperar as demais
+STREAM_IDEAS = os.getenv('STREAM_IDEAS', '1') == '1'
+
+# Gera título, descrição, palavras-chave e ideias numa única chamada JSON ao GPT
+ONE_SHOT_MODE = os.getenv('ONE_SHOT_MODE', '0') == '1'
+
+# Número de posts gerados ao mesmo tempo (GPT, imagens e Django); o Pinterest é sempre serial
+POST_CONCURRENCY = int(os.getenv('POST_CONCURRENCY', '3'))
+
+# Pipeline de imagens: geração/download, conversão WebP e upload em paralelo
+IMAGE_PIPELINE = os.getenv('IMAGE_PIPELINE', '1') == '1'
+IMAGE_FETCH_WORKERS = int(os.getenv('IMAGE_FETCH_WORKERS', '4'))
+WEBP_ENCODE_WORKERS = int(os.getenv('WEBP_ENCODE_WORKERS', str(os.cpu_count() or 1)))
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '2'))
+
+# Conversão WebP: presets de esforço (method 0-6 do Pillow) e qualidade
+WEBP_PRESETS = {
+    'fast': {'quality': 75, 'method': 2},
+    'balanced': {'quality': 80, 'method': 4},
+    'max': {'quality': 80, 'method': 6},
+}
+WEBP_PRESET = os.getenv('WEBP_PRESET', 'balanced')
+# Larguras das variantes responsivas geradas junto com cada imagem, ex.: "384,768" (vazio = nenhuma)
+WEBP_VARIANTS = [int(width) for width in os.getenv('WEBP_VARIANTS', '').split(',') if width.strip()]
+
+# GetIMG: endpoint e parâmetros padrão das imagens
+GETIMG_URL = os.getenv('GETIMG_URL', "https://api.getimg.ai/v1/flux-schnell/text-to-image")
+GETIMG_WIDTH = int(os.getenv('GETIMG_WIDTH', '768'))
+GETIMG_HEIGHT = int(os.getenv('GETIMG_HEIGHT', '1280'))
+GETIMG_STEPS = int(os.getenv('GETIMG_STEPS', '4'))
+GETIMG_OUTPUT_FORMAT = os.getenv('GETIMG_OUTPUT_FORMAT', 'jpeg')
+# Cliente assíncrono: envia todos os prompts do post de uma vez (1) ou usa threads (0)
+GETIMG_ASYNC = os.getenv('GETIMG_ASYNC', '1') == '1'
+
+# Servidor de mídia (SSH/SFTP)
+SFTP_SERVER = os.getenv('SFTP_SERVER', "srv643463.hstgr.cloud")  # Ou "217.21.78.21"
+SFTP_USERNAME = os.getenv('SFTP_USERNAME', "root")
+SFTP_PASSWORD = os.getenv('SFTP_PASSWORD', ":6S39:g==Mb[w6l2Ua9Y")
+SFTP_PORT = int(os.getenv('SFTP_PORT', '22'))
+SFTP_POOL_SIZE = int(os.getenv('SFTP_POOL_SIZE', '3'))  # Canais SFTP simultâneos por conexão
+SFTP_KEEPALIVE = int(os.getenv('SFTP_KEEPALIVE', '30'))  # Segundos entre pacotes keepalive
+# 'stream': envia cada imagem assim que convertida; 'batch': envia todas as imagens do post de uma vez
+UPLOAD_MODE = os.getenv('UPLOAD_MODE', 'stream')
+
+# Mantém o WebP em memória (BytesIO) do encode até o SFTP e o Django; o disco vira arquivo opcional
+IN_MEMORY_IMAGES = os.getenv('IN_MEMORY_IMAGES', '0') == '1'
+# Em modo em memória, grava também as imagens internas em ~/media (a destacada é sempre gravada para o Pinterest)
+ARCHIVE_IMAGES = os.getenv('ARCHIVE_IMAGES', '1') == '1'
+
+# Sessão HTTP compartilhada: tamanho do pool por host, timeout padrão e tentativas
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '120'))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '3'))
+HTTP_DEFAULT_POOL_SIZE = int(os.getenv('HTTP_DEFAULT_POOL_SIZE', '4'))
+HTTP_POOL_SIZES = {
+    'api.getimg.ai': IMAGE_FETCH_WORKERS * 2,
+    'www.dailydecorideas.com': 4,
+}
+
+# Cache de temas existentes no Django (arquivo opcional; vazio = apenas em memória)
+THEME_CACHE_FILE = os.getenv('THEME_CACHE_FILE', '')
+THEME_CACHE_TTL = int(os.getenv('THEME_CACHE_TTL', str(24 * 60 * 60)))  # segundos
+
+# Cache de respostas do GPT: 'on' (lê e grava), 'replay' (só serve do cache) ou 'off'
+COMPLETION_CACHE = os.getenv('COMPLETION_CACHE', 'on')
+COMPLETION_CACHE_PATH = os.getenv(
+    'COMPLETION_CACHE_PATH', str(Path.home() / ".cache" / "blog_automation" / "completions.sqlite3")
+)
+COMPLETION_CACHE_MAX_BYTES = int(os.getenv('COMPLETION_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+
+# Cache local das imagens da GetIMG, endereçado pelo prompt e parâmetros de geração
+IMAGE_CACHE = os.getenv('IMAGE_CACHE', '1') == '1'
+IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR', str(Path.home() / ".cache" / "blog_automation" / "images"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(500 * 1024 * 1024)))
+
+# Diário de execução (SQLite): permite retomar posts interrompidos na primeira etapa incompleta
+JOURNAL = os.getenv('JOURNAL', '1') == '1'
+JOURNAL_PATH = os.getenv('JOURNAL_PATH', str(Path.home() / ".cache" / "blog_automation" / "journal.sqlite3"))
+# Tentativas de publicação no Django (entre execuções) antes de o post ser dado como falho
+DJANGO_MAX_ATTEMPTS = int(os.getenv('DJANGO_MAX_ATTEMPTS', '3'))
+
+# Chrome/Pinterest: modo headless, perfil persistente, cookies da sessão e drivers pré-aquecidos
+PINTEREST_HEADLESS = os.getenv('PINTEREST_HEADLESS', '0') == '1'
+CHROME_USER_DATA_DIR = os.getenv('CHROME_USER_DATA_DIR', '')
+PINTEREST_COOKIES_FILE = os.getenv(
+    'PINTEREST_COOKIES_FILE', str(Path.home() / ".cache" / "blog_automation" / "pinterest_cookies.json")
+)
+WEBDRIVER_POOL_SIZE = int(os.getenv('WEBDRIVER_POOL_SIZE', '1'))
+
+# Ritmo do Pinterest: intervalo mínimo entre pins (+ variação aleatória) e pausa curta entre ações na página
+PIN_MIN_INTERVAL = float(os.getenv('PIN_MIN_INTERVAL', '20'))
+PIN_INTERVAL_JITTER = float(os.getenv('PIN_INTERVAL_JITTER', '10'))
+PINTEREST_ACTION_PAUSE = (
+    float(os.getenv('PINTEREST_ACTION_PAUSE_MIN', '0.2')),
+    float(os.getenv('PINTEREST_ACTION_PAUSE_MAX', '0.6')),
+)
+
+# Publicação dos pins: 'selenium' (navegador) ou 'api' (Pinterest API v5)
+PINTEREST_BACKEND = os.getenv('PINTEREST_BACKEND', 'selenium')
+PINTEREST_API_URL = os.getenv('PINTEREST_API_URL', 'https://api.pinterest.com/v5')
+PINTEREST_API_TOKEN = os.getenv('PINTEREST_API_TOKEN')
+# URL pública das mídias; se definida, o pin usa a imagem já enviada ao servidor em vez de base64
+MEDIA_BASE_URL = os.getenv('MEDIA_BASE_URL', '')
+
+# Limites por provedor: requisições/min, tokens/min (0 = sem limite) e concorrência adaptativa (AIMD)
+OPENAI_RPM = float(os.getenv('OPENAI_RPM', '500'))
+OPENAI_TPM = float(os.getenv('OPENAI_TPM', '200000'))
+OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', '8'))
+GETIMG_RPM = float(os.getenv('GETIMG_RPM', '60'))
+GETIMG_MAX_CONCURRENCY = int(os.getenv('GETIMG_MAX_CONCURRENCY', '4'))
+RATE_LIMIT_ATTEMPTS = int(os.getenv('RATE_LIMIT_ATTEMPTS', '5'))
+RATE_LIMIT_MAX_BACKOFF = float(os.getenv('RATE_LIMIT_MAX_BACKOFF', '60'))
+
+# Rastreamento por etapa: arquivo JSONL com uma linha por etapa concluída (vazio = só o resumo no fim)
+TRACE_FILE = os.getenv('TRACE_FILE', '')
+
+# ========================
+# Tracing
+# ========================
+
+# Contadores somados em cada etapa por trace_add
+SPAN_COUNTERS = ('retries', 'bytes', 'images', 'cached', 'prompt_tokens', 'completion_tokens', 'total_tokens')
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+_current_post = contextvars.ContextVar('current_post', default=None)
+_trace_lock = threading.Lock()
+_trace_spans = []
+_trace_file = None
+
+
+@contextmanager
+def trace_span(stage, post=None):
+    """
+    Mede uma etapa (tempo de parede e contadores) e a registra ao terminar.
+
+    :param stage: Nome da etapa, ex.: 'title', 'image', 'upload'
+    :param post: Identificador do post; se omitido, herda o da etapa externa. Informado, vale
+                 também para as etapas internas.
+    Os contadores de trace_add vão para a etapa mais interna em andamento no mesmo contexto;
+    threads auxiliares herdam o contexto com contextvars.copy_context().
+    """
+    post_token = _current_post.set(post) if post is not None else None
+    span = {'post': _current_post.get(), 'stage': stage, 'start': time.time(), 'ok': True}
+    span.update(dict.fromkeys(SPAN_COUNTERS, 0))
+    span_token = _current_span.set(span)
+    started = time.perf_counter()
+    try:
+        yield span
+    except BaseException:
+        span['ok'] = False
+        raise
+    finally:
+        span['wall'] = time.perf_counter() - started
+        _current_span.reset(span_token)
+        if post_token is not None:
+            _current_post.reset(post_token)
+        record_span(span)
+
+
+def traced(stage):
+    """Decorador: executa a função (ou corrotina) dentro de trace_span(stage). Falha se devolver None ou False."""
+    def decorator(fn):
+        def nested():
+            # Chamadas recursivas ou repetidas dentro da mesma etapa não abrem outra
+            span = _current_span.get()
+            return span is not None and span['stage'] == stage
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if nested():
+                    return await fn(*args, **kwargs)
+                with trace_span(stage) as span:
+                    result = await fn(*args, **kwargs)
+                    span['ok'] = result is not None and result is not False
+                    return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if nested():
+                return fn(*args, **kwargs)
+            with trace_span(stage) as span:
+                result = fn(*args, **kwargs)
+                span['ok'] = result is not None and result is not False
+                return result
+        return wrapper
+    return decorator
+
+
+def trace_add(**counters):
+    """Soma contadores (retries, bytes, images, cached, *_tokens) à etapa em andamento, se houver."""
+    span = _current_span.get()
+    if span is None:
+        return
+    with _trace_lock:
+        for name, value in counters.items():
+            span[name] += value or 0
+
+
+def trace_usage(response):
+    """Soma os tokens de `response.usage` de uma resposta do OpenAI."""
+    usage = response.get('usage') or {}
+    trace_add(
+        prompt_tokens=usage.get('prompt_tokens', 0),
+        completion_tokens=usage.get('completion_tokens', 0),
+        total_tokens=usage.get('total_tokens', 0),
+    )
+
+
+def new_trace_id():
+    return os.urandom(4).hex()
+
+
+def record_span(span):
+    """Guarda a etapa para o resumo e, com TRACE_FILE, grava-a como uma linha JSON."""
+    global _trace_file
+    with _trace_lock:
+        _trace_spans.append(span)
+        if not TRACE_FILE:
+            return
+        try:
+            if _trace_file is None:
+                _trace_file = open(TRACE_FILE, 'a', encoding='utf-8')
+            _trace_file.write(json.dumps(span, default=str) + '\n')
+            _trace_file.flush()
+        except OSError as e:
+            print(f"Erro ao gravar rastreamento: {e}")
+
+
+def percentile(values, pct):
+    """Percentil pelo método do posto mais próximo (values já ordenados)."""
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values) - 1, int(-(-pct * len(values) // 100)) - 1))]
+
+
+def print_trace_summary():
+    """Imprime p50/p95 do tempo de parede por etapa, com falhas, tentativas extras, bytes, imagens e tokens."""
+    with _trace_lock:
+        spans = list(_trace_spans)
+    if not spans:
+        return
+    by_stage = {}
+    for span in spans:
+        by_stage.setdefault(span['stage'], []).append(span)
+
+    print(f"{'etapa':<12}{'n':>5}{'p50 s':>9}{'p95 s':>9}{'máx s':>9}{'falhas':>8}{'retries':>9}{'KB':>10}{'imagens':>9}{'tokens':>9}")
+    for stage, stage_spans in sorted(by_stage.items(), key=lambda item: -sum(s['wall'] for s in item[1])):
+        walls = sorted(s['wall'] for s in stage_spans)
+        print(
+            f"{stage:<12}{len(walls):>5}{percentile(walls, 50):>9.2f}{percentile(walls, 95):>9.2f}{walls[-1]:>9.2f}"
+            f"{sum(1 for s in stage_spans if not s['ok']):>8}{sum(s['retries'] for s in stage_spans):>9}"
+            f"{sum(s['bytes'] for s in stage_spans) / 1024:>10.0f}{sum(s['images'] for s in stage_spans):>9}"
+            f"{sum(s['total_tokens'] for s in stage_spans):>9}"
+        )
+    if TRACE_FILE:
+        print(f"Rastreamento gravado em {TRACE_FILE}")
+
+# ========================
+# HTTP Session
+# ========================
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def _http_adapter(pool_size):
+    # Métodos não idempotentes (POST) só são repetidos em falhas de conexão, antes do envio
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=16, pool_maxsize=pool_size, max_retries=retry)
+
+
+def get_http_session():
+    """Devolve a sessão HTTP compartilhada (keep-alive e pool de conexões por host)."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            # Hosts sem configuração própria (ex.: CDN da GetIMG) usam o adaptador padrão
+            session.mount('https://', _http_adapter(HTTP_DEFAULT_POOL_SIZE))
+            session.mount('http://', _http_adapter(HTTP_DEFAULT_POOL_SIZE))
+            for host, pool_size in HTTP_POOL_SIZES.items():
+                session.mount(f'https://{host}/', _http_adapter(pool_size))
+            _http_session = session
+        return _http_session
+
+
+def http_request(method, url, **kwargs):
+    """Executa uma requisição pela sessão compartilhada, com timeout padrão."""
+    kwargs.setdefault('timeout', HTTP_TIMEOUT)
+    response = get_http_session().request(method, url, **kwargs)
+    retries = getattr(response.raw, 'retries', None)
+    body = response.request.body
+    trace_add(
+        retries=len(retries.history) if retries is not None else 0,
+        bytes=(len(body) if body is not None else 0) + len(response.content),
+    )
+    return response
+
+
+def http_get(url, **kwargs):
+    return http_request('GET', url, **kwargs)
+
+
+_async_http_stats = {}  # host -> contadores do cliente assíncrono (aiohttp)
+_async_http_stats_lock = threading.Lock()
+
+
+def _count_async_http(host, **counters):
+    with _async_http_stats_lock:
+        host_stats = _async_http_stats.setdefault(host, {'requests': 0, 'connections': 0, 'reused': 0})
+        for name, value in counters.items():
+            host_stats[name] += value
+
+
+def async_http_trace_config():
+    """TraceConfig do aiohttp que soma requisições, conexões abertas e reutilizadas em http_stats()."""
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, context, params):
+        context.host = params.url.host
+        _count_async_http(context.host, requests=1)
+
+    async def on_connection_create_end(session, context, params):
+        _count_async_http(context.host, connections=1)
+
+    async def on_connection_reuseconn(session, context, params):
+        _count_async_http(context.host, reused=1)
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
+
+
+def http_post(url, **kwargs):
+    return http_request('POST', url, **kwargs)
+
+
+def http_stats():
+    """Contadores por host (sessão compartilhada e cliente assíncrono): requisições, conexões abertas e conexões reutilizadas."""
+    stats = {}
+    with _async_http_stats_lock:
+        for host, async_stats in _async_http_stats.items():
+            stats[host] = dict(async_stats)
+    if _http_session is None:
+        return stats
+    for adapter in set(_http_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host_stats = stats.setdefault(pool.host, {'requests': 0, 'connections': 0, 'reused': 0})
+            host_stats['requests'] += pool.num_requests
+            host_stats['connections'] += pool.num_connections
+            host_stats['reused'] += max(0, pool.num_requests - pool.num_connections)
+    return stats
+
+
+def print_http_stats():
+    for host, host_stats in sorted(http_stats().items()):
+        print(
+            f"HTTP {host}: {host_stats['requests']} requisições, "
+            f"{host_stats['connections']} conexões, {host_stats['reused']} reutilizadas"
+        )
+
+# ========================
+# Rate Limiting
+# ========================
+
+class TokenBucket:
+    """Balde de fichas com reposição contínua: `per_minute` fichas por minuto (0 = ilimitado)."""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """Reserva `amount` fichas e devolve quantos segundos esperar até poder usá-las."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+
+class AdaptiveConcurrency:
+    """Limite de chamadas simultâneas AIMD: sobe +1 por janela de sucessos, cai pela metade em 429/5xx."""
+
+    def __init__(self, maximum, initial=None, minimum=1):
+        self.maximum = max(minimum, maximum)
+        self.minimum = minimum
+        self.limit = float(initial or self.maximum)
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    def try_acquire(self):
+        with self._cond:
+            if self.in_use < int(self.limit):
+                self.in_use += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self._cond:
+            while self.in_use >= int(self.limit):
+                self._cond.wait()
+            self.in_use += 1
+
+    def release(self):
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self.limit = max(self.minimum, self.limit / 2)
+
+
+def parse_retry_after(value):
+    """Converte o cabeçalho Retry-After (segundos) em float, ou None."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def discard_response(result):
+    """Libera a conexão de uma resposta que não será lida (requests ou aiohttp)."""
+    if result is None:
+        return
+    release = getattr(result, 'release', None) or getattr(result, 'close', None)
+    if release is not None:
+        release()
+
+
+class ProviderLimiter:
+    """
+    Limitador de um provedor: baldes de requisições e tokens por minuto, concorrência adaptativa
+    e novas tentativas com backoff exponencial com jitter (ou Retry-After, quando informado).
+
+    `classify(result, error)` devolve (veredito, retry_after): 'throttle' para 429/503 (reduz a
+    concorrência), 'retry' para outras falhas temporárias (5xx, rede; só repete) ou None.
+    """
+
+    def __init__(self, name, rpm, tpm, max_concurrency, classify):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.classify = classify
+
+    def _budget_delay(self, tokens):
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens) if tokens else 0.0)
+
+    def _backoff(self, attempt, retry_after):
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(RATE_LIMIT_MAX_BACKOFF, 2 ** attempt))
+
+    def run(self, fn, tokens=0, attempts=None):
+        """Executa fn() respeitando os limites; repete em 429/5xx e devolve o último resultado."""
+        attempts = attempts or RATE_LIMIT_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            time.sleep(self._budget_delay(tokens))
+            self.concurrency.acquire()
+            try:
+                result, error = fn(), None
+            except Exception as e:
+                result, error = None, e
+            finally:
+                self.concurrency.release()
+
+            verdict, retry_after = self.classify(result, error)
+            if verdict is None:
+                self.concurrency.on_success()
+                if error is not None:
+                    raise error
+                return result
+            if verdict == 'throttle':
+                self.concurrency.on_throttle()
+            if attempt == attempts:
+                if error is not None:
+                    raise error
+                return result
+            # A resposta descartada devolve a conexão ao pool antes da nova tentativa
+            discard_response(result)
+            delay = self._backoff(attempt, retry_after)
+            trace_add(retries=1)
+            reason = 'limite atingido' if verdict == 'throttle' else 'falha temporária'
+            print(f"{self.name}: {reason}, nova tentativa em {delay:.1f}s ({attempt} de {attempts})")
+            time.sleep(delay)
+
+    async def run_async(self, coro_fn, tokens=0, attempts=None):
+        """Versão assíncrona de run: coro_fn() devolve a corrotina a aguardar."""
+        attempts = attempts or RATE_LIMIT_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            await asyncio.sleep(self._budget_delay(tokens))
+            while not self.concurrency.try_acquire():
+                await asyncio.sleep(0.05)
+            try:
+                result, error = await coro_fn(), None
+            except Exception as e:
+                result, error = None, e
+            finally:
+                self.concurrency.release()
+
+            verdict, retry_after = self.classify(result, error)
+            if verdict is None:
+                self.concurrency.on_success()
+                if error is not None:
+                    raise error
+                return result
+            if verdict == 'throttle':
+                self.concurrency.on_throttle()
+            if attempt == attempts:
+                if error is not None:
+                    raise error
+                return result
+            # A resposta descartada devolve a conexão ao pool antes da nova tentativa
+            discard_response(result)
+            delay = self._backoff(attempt, retry_after)
+            trace_add(retries=1)
+            reason = 'limite atingido' if verdict == 'throttle' else 'falha temporária'
+            print(f"{self.name}: {reason}, nova tentativa em {delay:.1f}s ({attempt} de {attempts})")
+            await asyncio.sleep(delay)
+
+
+def classify_openai(result, error):
+    """Erros do OpenAI: limite (429/503) reduz a concorrência; erros de servidor e de rede só são repetidos."""
+    if error is None:
+        return None, None
+    headers = getattr(error, 'headers', None) or {}
+    retry_after = parse_retry_after(headers.get('retry-after') or headers.get('Retry-After'))
+    if isinstance(error, (openai.error.RateLimitError, openai.error.ServiceUnavailableError)):
+        return 'throttle', retry_after
+    if isinstance(error, (
+        openai.error.APIError,
+        openai.error.Timeout,
+        openai.error.TryAgain,
+        openai.error.APIConnectionError,
+    )):
+        return 'retry', retry_after
+    return None, None
+
+
+def classify_http(result, error):
+    """Respostas HTTP da GetIMG (requests ou aiohttp): 429/503 limitam, outros 5xx e falhas de conexão só são repetidos."""
+    if error is not None:
+        network_error = isinstance(error, (
+            requests.exceptions.ConnectionError,
+            aiohttp.ClientConnectionError,
+            asyncio.TimeoutError,
+        ))
+        return ('retry' if network_error else None), None
+    status = getattr(result, 'status_code', None) or getattr(result, 'status', 0)
+    if status in (429, 503):
+        return 'throttle', parse_retry_after(result.headers.get('Retry-After'))
+    if status >= 500:
+        return 'retry', parse_retry_after(result.headers.get('Retry-After'))
+    return None, None
+
+
+def estimate_tokens(prompt, completion_tokens=600):
+    """Estimativa simples de tokens para o balde de tokens/min (~4 caracteres por token)."""
+    return len(prompt) // 4 + completion_tokens
+
+
+OPENAI_LIMITER = ProviderLimiter('OpenAI', OPENAI_RPM, OPENAI_TPM, OPENAI_MAX_CONCURRENCY, classify_openai)
+GETIMG_LIMITER = ProviderLimiter('GetIMG', GETIMG_RPM, 0, GETIMG_MAX_CONCURRENCY, classify_http)
+
+# ========================
+# OpenAI Completions
+# ========================
+
+class CompletionCacheMiss(Exception):
+    """Resposta ausente no cache em modo replay."""
+
+
+class CompletionCache:
+    """Cache em SQLite das respostas do GPT, endereçado pelo hash de modelo + prompt, com despejo LRU por tamanho."""
+
+    def __init__(self, path, max_bytes):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, model TEXT, content TEXT, size INTEGER, last_used REAL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def make_key(model, prompt, variant=1, **params):
+        raw = json.dumps({'model': model, 'prompt': prompt, 'variant': variant, 'params': params}, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT content FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return row[0]
+
+    def put(self, key, model, content):
+        size = len(content.encode('utf-8'))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, model, content, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, model, content, size, time.time())
+            )
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+            if total > self.max_bytes:
+                # Remove as entradas usadas há mais tempo até caber no limite
+                for old_key, old_size in self._db.execute(
+                    "SELECT key, size FROM completions ORDER BY last_used ASC"
+                ).fetchall():
+                    if total <= self.max_bytes or old_key == key:
+                        break
+                    self._db.execute("DELETE FROM completions WHERE key = ?", (old_key,))
+                    total -= old_size
+            self._db.commit()
+
+
+_completion_cache = None
+_completion_cache_lock = threading.Lock()
+
+
+def get_completion_cache():
+    """Devolve o cache de respostas (None se COMPLETION_CACHE=off)."""
+    global _completion_cache
+    if COMPLETION_CACHE == 'off':
+        return None
+    with _completion_cache_lock:
+        if _completion_cache is None:
+            _completion_cache = CompletionCache(COMPLETION_CACHE_PATH, COMPLETION_CACHE_MAX_BYTES)
+        return _completion_cache
+
+
+_replay_sequence = {}
+_replay_sequence_lock = threading.Lock()
+
+
+def replay_key(kind, theme):
+    """
+    Chave de cache estável para prompts com parte aleatória (ex.: o número de ideias do título).
+
+    Combina tipo, tema e a ordem do pedido na execução, para que o modo replay encontre as
+    respostas gravadas mesmo com outro número sorteado.
+    """
+    with _replay_sequence_lock:
+        n = _replay_sequence[(kind, theme)] = _replay_sequence.get((kind, theme), 0) + 1
+    return f"{kind}:{theme}:{n}"
+
+
+def replayable_choice(cache_key, choices):
+    """Sorteia um valor de `choices` e grava-o no cache, para que o modo replay repita o mesmo sorteio."""
+    cache = get_completion_cache()
+    key = cache.make_key('choice', cache_key) if cache is not None else None
+    if COMPLETION_CACHE == 'replay':
+        value = cache.get(key)
+        if value is None:
+            raise CompletionCacheMiss(f"Sorteio não encontrado no cache (replay): {cache_key}")
+        return json.loads(value)
+    value = random.choice(choices)
+    if cache is not None:
+        cache.put(key, 'choice', json.dumps(value))
+    return value
+
+
+def _cached_completion(model, prompt, attempt, fresh, params, cache_key=None, validate=None):
+    """Consulta o cache. Devolve (cache, chave, conteúdo ou None); fora do replay, respostas que não passam em `validate` contam como ausentes."""
+    cache = get_completion_cache()
+    if cache is None:
+        return None, None, None
+    key = cache.make_key(model, cache_key or prompt, attempt, **params)
+    if COMPLETION_CACHE == 'replay':
+        content = cache.get(key)
+        if content is None:
+            raise CompletionCacheMiss(f"Resposta não encontrada no cache (replay): {key[:12]}")
+        return cache, key, content
+    content = None if fresh else cache.get(key)
+    if content is not None and validate is not None and not validate(content):
+        return cache, key, None
+    return cache, key, content
+
+
+def _store_completion(cache, key, model, content, validate):
+    """Grava a resposta no cache, exceto se falhar em `validate` (uma nova execução deve pedir outra)."""
+    if cache is not None and (validate is None or validate(content)):
+        cache.put(key, model, content)
+
+
+def chat_completion(prompt, model="gpt-4o-mini", attempt=1, fresh=False, cache_key=None, validate=None, **params):
+    """
+    Envia um prompt ao GPT e devolve o texto da resposta, passando pelo cache.
+
+    :param attempt: Número da tentativa; entra na chave para que novas tentativas não recebam a mesma resposta
+    :param fresh: Sempre chama a API (a resposta é gravada para o modo replay), ex.: títulos
+    :param cache_key: Substitui o prompt na chave do cache (ver replay_key)
+    :param validate: Função que aceita ou não a resposta; só respostas aceitas são gravadas no cache
+    """
+    cache, key, content = _cached_completion(model, prompt, attempt, fresh, params, cache_key, validate)
+    if content is not None:
+        trace_add(cached=1)
+        return content
+    response = OPENAI_LIMITER.run(
+        lambda: openai.ChatCompletion.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            **params
+        ),
+        tokens=estimate_tokens(prompt)
+    )
+    trace_usage(response)
+    content = response.choices[0].message['content']
+    _store_completion(cache, key, model, content, validate)
+    return content
+
+
+async def chat_completion_async(prompt, model="gpt-4o-mini", attempt=1, fresh=False, cache_key=None, validate=None, **params):
+    """Versão assíncrona de chat_completion."""
+    cache, key, content = _cached_completion(model, prompt, attempt, fresh, params, cache_key, validate)
+    if content is not None:
+        trace_add(cached=1)
+        return content
+    response = await OPENAI_LIMITER.run_async(
+        lambda: openai.ChatCompletion.acreate(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            **params
+        ),
+        tokens=estimate_tokens(prompt)
+    )
+    trace_usage(response)
+    content = response.choices[0].message['content']
+    _store_completion(cache, key, model, content, validate)
+    return content
 
 # ========================
 # Generate Blog Texts
 # ========================
 
-def generate_blog_title(theme, attempt=1, max_attempts=2):
+@traced('title')
+def generate_blog_title(theme, attempt=1, max_attempts=2, cache_key=None):
 
+    # O número sorteado muda o prompt: no cache, o título é identificado pelo tema e pela ordem do pedido
+    cache_key = cache_key or replay_key('title', theme)
     number_of_ideas = random.choice([3, 4, 5, 6, 7])
 
     prompt = (
@@ -45,16 +867,13 @@ def generate_blog_title(theme, attempt=1, max_attempts=2):
     )
 
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        title = response.choices[0].message['content'].strip()
+        # Títulos são sempre novos: o cache não pode repetir o mesmo post
+        title = chat_completion(prompt, attempt=attempt, fresh=True, cache_key=cache_key).strip()
 
         if len(title) > 100:
             if attempt < max_attempts:
                 print(f"O título gerado excede 100 caracteres. Tentativa {attempt} de {max_attempts}...")
-                return generate_blog_title(theme, attempt + 1)
+                return generate_blog_title(theme, attempt + 1, max_attempts, cache_key)
             else:
                 return title
 
@@ -65,6 +884,7 @@ def generate_blog_title(theme, attempt=1, max_attempts=2):
         print("Erro ao gerar título:", e)
         return None
 
+@traced('keywords')
 def generate_keywords(title, theme):
     """Gera palavras-chave relevantes com base no título e tema usando o GPT."""
     prompt = (
@@ -73,11 +893,7 @@ def generate_keywords(title, theme):
         "Return the keywords separated by commas."
     )
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        keywords = response.choices[0].message['content'].strip()
+        keywords = chat_completion(prompt).strip()
         # Separar as palavras-chave geradas e formatar como hashtags
         hashtags = ', '.join([f"#{slugify(keyword.strip())}" for keyword in keywords.split(",")])
         print("Keywords geradas:", hashtags)
@@ -87,6 +903,7 @@ def generate_keywords(title, theme):
         return ""
 
 
+@traced('description')
 def generate_main_description(theme, title):
     """Gera uma descrição principal para o post do blog usando a API do OpenAI, limitada a 155 caracteres."""
     prompt = (
@@ -96,11 +913,7 @@ def generate_main_description(theme, title):
     )
     try:
         print("Gerando main_description")
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        description = response.choices[0].message['content'].strip()
+        description = chat_completion(prompt).strip()
         # Assegura que a descrição não exceda 155 caracteres
         if len(description) > 155:
             print(f"main_description excede 155 caracteres ({len(description)}). Truncando...")
@@ -135,35 +948,53 @@ def parse_idea_response(text):
 
 
 
-def generate_related_ideas(title):
-    """Gera ideias relacionadas fazendo requisições individuais para cada ideia."""
+def is_valid_idea_text(text):
+    """Resposta de ideia aproveitável (ver parse_idea_response); as demais não vão para o cache."""
+    return parse_idea_response(text.strip()) is not None
+
+
+def build_idea_prompt(title, i, num_ideas):
+    """Monta o prompt para a ideia número i de num_ideas."""
+    return (
+        f"Based on the blog title '{title}', generate idea number {i} out of {num_ideas}. "
+        "The idea should include a catchy phrase and a detailed description of at least 45 words. "
+        "Format:\nIdea: [Catchy Phrase]\nDescription: [Description]"
+        "Do not include any additional text or formatting outside this format."
+    )
+
+
+@traced('ideas')
+def generate_related_ideas(title, concurrency=None):
+    """Gera ideias relacionadas fazendo requisições individuais para cada ideia.
+
+    Com concurrency > 1 as requisições são enviadas em paralelo (ver generate_related_ideas_async).
+    """
+    concurrency = IDEAS_CONCURRENCY if concurrency is None else concurrency
+    if concurrency > 1:
+        return asyncio.run(generate_related_ideas_async(title, concurrency=concurrency))
+    return [idea_data for _, idea_data in generate_ideas_sequential(title)]
+
+
+def generate_ideas_sequential(title, max_attempts_per_idea=3, skip=()):
+    """Gera as ideias uma a uma (exceto os números em `skip`), produzindo (número, ideia) para cada ideia analisada com sucesso."""
     num_ideas = extract_number_from_title(title)
-    ideas_with_descriptions = []
-    max_attempts_per_idea = 3  # Número de tentativas por ideia
 
     for i in range(1, num_ideas + 1):
+        if i in skip:
+            continue
         attempt = 0
         while attempt < max_attempts_per_idea:
             attempt += 1
             print(f"Generating idea {i} of {num_ideas}, attempt {attempt} of {max_attempts_per_idea}...")
 
-            prompt = (
-                f"Based on the blog title '{title}', generate idea number {i} out of {num_ideas}. "
-                "The idea should include a catchy phrase and a detailed description of at least 45 words. "
-                "Format:\nIdea: [Catchy Phrase]\nDescription: [Description]"
-                "Do not include any additional text or formatting outside this format."
-            )
+            prompt = build_idea_prompt(title, i, num_ideas)
 
             try:
-                response = openai.ChatCompletion.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                idea_text = response.choices[0].message['content'].strip()
+                idea_text = chat_completion(prompt, attempt=attempt, validate=is_valid_idea_text).strip()
                 # Analisar a ideia e a descrição da resposta
                 idea_data = parse_idea_response(idea_text)
                 if idea_data:
-                    ideas_with_descriptions.append(idea_data)
+                    yield i, idea_data
                     break  # Sai do loop de tentativas para esta ideia
                 else:
                     print(f"Error: Could not parse idea {i}. Retrying...")
@@ -173,7 +1004,268 @@ def generate_related_ideas(title):
             print(f"Failed to generate idea {i} after {max_attempts_per_idea} attempts.")
             # Você pode decidir continuar ou sair, dependendo da sua preferência
 
-    return ideas_with_descriptions
+
+def iter_related_ideas(title, concurrency=None, known=None):
+    """
+    Produz (número, ideia) assim que cada ideia é analisada, na ordem em que ficam prontas.
+
+    As ideias são geradas numa thread à parte (em paralelo com concurrency > 1), para que quem
+    consome o fluxo, como o pipeline de imagens, trabalhe enquanto as demais ainda são escritas.
+    Ideias que falham em todas as tentativas não são produzidas. `known` ({número: ideia}) traz
+    ideias já geradas, produzidas primeiro e não pedidas de novo.
+    """
+    concurrency = IDEAS_CONCURRENCY if concurrency is None else concurrency
+    # O contexto do post é capturado aqui: o primeiro next() pode acontecer em outra thread
+    context = contextvars.copy_context()
+    return _iter_related_ideas(title, concurrency, dict(known or {}), context)
+
+
+def _iter_related_ideas(title, concurrency, known, context):
+    ideas = queue.Queue()
+
+    async def produce_async():
+        async for item in iter_related_ideas_async(title, concurrency=concurrency, skip=known):
+            ideas.put(item)
+
+    def produce():
+        try:
+            with trace_span('ideas'):
+                if concurrency > 1:
+                    asyncio.run(produce_async())
+                else:
+                    for item in generate_ideas_sequential(title, skip=known):
+                        ideas.put(item)
+        finally:
+            ideas.put(None)
+
+    yield from sorted(known.items())
+    threading.Thread(target=context.run, args=(produce,), daemon=True).start()
+    while True:
+        item = ideas.get()
+        if item is None:
+            return
+        yield item
+
+
+async def generate_idea_async(title, i, num_ideas, semaphore, max_attempts=3):
+    """Gera uma única ideia, repetindo apenas esta requisição se a resposta não puder ser analisada."""
+    prompt = build_idea_prompt(title, i, num_ideas)
+    for attempt in range(1, max_attempts + 1):
+        async with semaphore:
+            print(f"Generating idea {i} of {num_ideas}, attempt {attempt} of {max_attempts}...")
+            try:
+                idea_text = (await chat_completion_async(prompt, attempt=attempt, validate=is_valid_idea_text)).strip()
+                idea_data = parse_idea_response(idea_text)
+                if idea_data:
+                    return idea_data
+                print(f"Error: Could not parse idea {i}. Retrying...")
+            except Exception as e:
+                print(f"Error generating idea {i}:", e)
+    print(f"Failed to generate idea {i} after {max_attempts} attempts.")
+    return None
+
+
+async def iter_related_ideas_async(title, concurrency=IDEAS_CONCURRENCY, max_attempts_per_idea=3, skip=()):
+    """Envia todas as ideias (exceto os números em `skip`) de uma vez, limitadas por `concurrency`, e produz (número, ideia) à medida que ficam prontas."""
+    num_ideas = extract_number_from_title(title)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def numbered(i):
+        return i, await generate_idea_async(title, i, num_ideas, semaphore, max_attempts_per_idea)
+
+    tasks = [asyncio.ensure_future(numbered(i)) for i in range(1, num_ideas + 1) if i not in skip]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            i, idea_data = await next_done
+            if idea_data:
+                yield i, idea_data
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def generate_related_ideas_async(title, concurrency=IDEAS_CONCURRENCY, max_attempts_per_idea=3):
+    """Envia todas as ideias de uma vez, limitadas por `concurrency`, e devolve-as na ordem original."""
+    results = {
+        i: idea_data
+        async for i, idea_data in iter_related_ideas_async(title, concurrency, max_attempts_per_idea)
+    }
+    return [results[i] for i in sorted(results)]
+
+
+def post_document_schema(fields):
+    """Monta o JSON schema (strict) contendo apenas os campos pedidos do post."""
+    properties = {
+        'title': {'type': 'string'},
+        'main_description': {'type': 'string'},
+        'keywords': {'type': 'array', 'items': {'type': 'string'}},
+        'ideas': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'number': {'type': 'integer'},
+                    'idea': {'type': 'string'},
+                    'description': {'type': 'string'},
+                },
+                'required': ['number', 'idea', 'description'],
+                'additionalProperties': False,
+            },
+        },
+    }
+    return {
+        'type': 'object',
+        'properties': {field: properties[field] for field in fields},
+        'required': list(fields),
+        'additionalProperties': False,
+    }
+
+
+def is_json_object(text):
+    """Resposta do modo de chamada única aproveitável: um objeto JSON completo."""
+    try:
+        return isinstance(json.loads(text), dict)
+    except ValueError:
+        return False
+
+
+def request_post_document(prompt, fields, attempt=1, fresh=False, cache_key=None):
+    """Pede ao GPT um documento JSON com os campos indicados, validado pelo schema."""
+    content = chat_completion(
+        prompt,
+        attempt=attempt,
+        fresh=fresh,
+        cache_key=cache_key,
+        validate=is_json_object,
+        response_format={
+            "type": "json_schema",
+            "json_schema": {"name": "blog_post", "schema": post_document_schema(fields), "strict": True},
+        }
+    )
+    return json.loads(content)
+
+
+def is_valid_idea(item):
+    """Mesmas regras de parse_idea_response: ideia não vazia e descrição com pelo menos 45 palavras."""
+    idea = (item.get('idea') or '').strip()
+    description = (item.get('description') or '').strip()
+    return bool(idea and description and len(description.split()) >= 45)
+
+
+def validate_post_document(doc, num_ideas):
+    """Devolve (campos inválidos, números das ideias inválidas ou ausentes)."""
+    invalid_fields = []
+    title = doc.get('title')
+    if not isinstance(title, str) or not title.strip() or len(title.strip()) > 100:
+        invalid_fields.append('title')
+    description = doc.get('main_description')
+    if not isinstance(description, str) or not description.strip() or len(description.strip()) > 155:
+        invalid_fields.append('main_description')
+    keywords = doc.get('keywords')
+    if not isinstance(keywords, list) or not [k for k in keywords if isinstance(k, str) and k.strip()]:
+        invalid_fields.append('keywords')
+
+    ideas = doc.get('ideas') if isinstance(doc.get('ideas'), dict) else {}
+    invalid_ideas = [i for i in range(1, num_ideas + 1) if i not in ideas or not is_valid_idea(ideas[i])]
+    if invalid_ideas:
+        invalid_fields.append('ideas')
+    return invalid_fields, invalid_ideas
+
+
+@traced('one_shot')
+def generate_post_one_shot(theme, max_attempts=3):
+    """
+    Gera título, main_description, keywords e ideias numa única chamada ao GPT.
+
+    Os campos que não passam nas regras (título até 100 caracteres, descrição até 155,
+    ideias com 45+ palavras) são pedidos novamente, apenas eles.
+    Devolve um dicionário com title, main_description, keywords (hashtags) e ideas.
+    """
+    # O prompt completo traz o número sorteado: no cache, é identificado pelo tema e pela ordem do
+    # pedido, e o próprio sorteio é gravado para que o replay valide e refaça os mesmos pedidos
+    full_prompt_key = replay_key('one_shot', theme)
+    try:
+        number_of_ideas = replayable_choice(full_prompt_key, [3, 4, 5, 6, 7])
+    except CompletionCacheMiss as e:
+        print("Erro ao gerar post em chamada única:", e)
+        return None
+    rules = (
+        f"- title: a catchy blog title that starts with the number {number_of_ideas}, no longer than 100 characters, "
+        "following the style of these examples:\n"
+        f"  {number_of_ideas} Ways to Elevate Your Home Office Design for Maximum Comfort (You Won't Believe #1!)\n"
+        f"  {number_of_ideas} Nail Art Trends You'll Want to Try This Season (Holiday Magic Alert at #2!)\n"
+        f"  {number_of_ideas} Hidden Gems in Europe Every Traveler Should Visit (Hint: #3 Is Revolutionary!)\n"
+        "- main_description: a brief introductory description of 2-3 sentences that engages the reader, "
+        "no longer than 155 characters.\n"
+        "- keywords: 6 SEO-friendly keywords targeting Pinterest users looking for ideas or inspiration in this niche.\n"
+        f"- ideas: exactly {number_of_ideas} items numbered 1 to {number_of_ideas}, each with a catchy phrase (idea) "
+        "and a detailed description of at least 45 words.\n"
+    )
+    full_prompt = (
+        f"Write a blog post outline for the theme '{theme}' as a JSON document with these fields:\n"
+        f"{rules}"
+    )
+
+    doc = {'ideas': {}}
+    fields = ['title', 'main_description', 'keywords', 'ideas']
+    invalid_ideas = list(range(1, number_of_ideas + 1))
+    for attempt in range(1, max_attempts + 1):
+        print(f"Gerando post em chamada única: campos {fields}, tentativa {attempt} de {max_attempts}...")
+        if attempt == 1 or 'title' in fields:
+            # Sem um título válido não há do que partir: repete o pedido completo
+            prompt, cache_key = full_prompt, full_prompt_key
+        else:
+            cache_key = None
+            prompt = (
+                f"For a blog post titled '{doc.get('title')}' about '{theme}', rewrite only these fields as a JSON document"
+                f"{f' (only ideas number {invalid_ideas})' if 'ideas' in fields else ''}, following the rules:\n"
+                f"{rules}"
+            )
+        try:
+            # O primeiro pedido depende só do tema: é sempre novo, como os títulos
+            answer = request_post_document(prompt, fields, attempt=attempt, fresh=attempt == 1, cache_key=cache_key)
+            if not isinstance(answer, dict):
+                raise ValueError(f"resposta não é um objeto JSON: {type(answer).__name__}")
+        except Exception as e:
+            print("Erro ao gerar post em chamada única:", e)
+            continue
+
+        for field in fields:
+            if field == 'ideas':
+                items = answer.get('ideas')
+                for item in items if isinstance(items, list) else []:
+                    if isinstance(item, dict) and item.get('number') in invalid_ideas and is_valid_idea(item):
+                        doc['ideas'][item['number']] = item
+            elif field in answer:
+                doc[field] = answer[field]
+
+        fields, invalid_ideas = validate_post_document(doc, number_of_ideas)
+        if not fields:
+            break
+        print(f"Campos inválidos: {fields}; ideias inválidas: {invalid_ideas}")
+
+    if not isinstance(doc.get('title'), str) or not doc['title'].strip():
+        print("Não foi possível gerar o título em chamada única.")
+        return None
+
+    title = doc['title'].strip()
+    description = (doc.get('main_description') or '').strip()
+    if len(description) > 155:
+        print(f"main_description excede 155 caracteres ({len(description)}). Truncando...")
+        description = description[:152].rstrip() + "..."
+    keywords = doc.get('keywords') if isinstance(doc.get('keywords'), list) else []
+    hashtags = ', '.join([f"#{slugify(str(keyword).strip())}" for keyword in keywords if str(keyword).strip()])
+    ideas = [
+        {'idea': doc['ideas'][i]['idea'].strip(), 'description': doc['ideas'][i]['description'].strip()}
+        for i in sorted(doc['ideas'])
+    ]
+    print(title)
+    return {
+        'title': title,
+        'main_description': description,
+        'keywords': hashtags,
+        'ideas': ideas,
+    }
 
 
 def clean_response_text(text, num_ideas):
@@ -197,19 +1289,34 @@ def clean_response_text(text, num_ideas):
 # Generate Blog Images
 # ========================
 
-def convert_to_webp(image, output_path, quality=80):
+def webp_settings(preset=None, quality=None, method=None):
+    """Devolve (quality, method) do preset (WEBP_PRESET por padrão), com os valores explícitos tendo prioridade."""
+    preset = preset or WEBP_PRESET
+    if preset not in WEBP_PRESETS:
+        raise ValueError(f"Preset WebP desconhecido: {preset} (use {', '.join(WEBP_PRESETS)})")
+    settings = WEBP_PRESETS[preset]
+    return (
+        settings['quality'] if quality is None else quality,
+        settings['method'] if method is None else method,
+    )
+
+
+def convert_to_webp(image, output_path, quality=None, method=None, preset=None):
     """
     Converte a imagem para o formato WebP com compressão.
 
     :param image: Objeto PIL Image
     :param output_path: Caminho para salvar a imagem WebP
     :param quality: Qualidade de compressão (0-100), maior é melhor qualidade
+    :param method: Esforço do codificador (0 = rápido, 6 = menor arquivo)
+    :param preset: 'fast', 'balanced' ou 'max'; quality/method informados têm prioridade
     """
+    quality, method = webp_settings(preset, quality, method)
     # Converte a imagem para RGB se necessário
     if image.mode in ("RGBA", "P"):
         image = image.convert("RGB")
     # Salva a imagem em formato WebP com a qualidade especificada
-    image.save(output_path, format='WEBP', quality=quality, method=6)
+    image.save(output_path, format='WEBP', quality=quality, method=method)
 
 
 def generate_image_prompt(title, idea, description):
@@ -230,15 +1337,66 @@ def generate_image_prompt(title, idea, description):
     print(prompt)
     return prompt
 
-def generate_image(prompt):
-    url = "https://api.getimg.ai/v1/flux-schnell/text-to-image"
+def image_cache_path(prompt, width, height, steps, output_format):
+    """Caminho da imagem no cache local, pelo hash do prompt e dos parâmetros de geração (a extensão segue o formato)."""
+    raw = json.dumps(
+        {'prompt': prompt, 'width': width, 'height': height, 'steps': steps, 'output_format': output_format},
+        sort_keys=True
+    )
+    return Path(IMAGE_CACHE_DIR) / f"{hashlib.sha256(raw.encode('utf-8')).hexdigest()}.{output_format}"
+
+
+def load_cached_image(cache_path):
+    """Devolve os bytes da imagem em cache (ou None), marcando-a como usada recentemente."""
+    try:
+        image_bytes = cache_path.read_bytes()
+        os.utime(cache_path)
+        return image_bytes
+    except OSError:
+        return None
 
+
+def store_cached_image(cache_path, image_bytes):
+    """Grava a imagem no cache e remove as menos usadas se o total passar de IMAGE_CACHE_MAX_BYTES."""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(image_bytes)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Erro ao gravar imagem no cache: {e}")
+        return
+
+    entries = []
+    for path in cache_path.parent.iterdir():
+        if path.suffix == '.tmp':
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= IMAGE_CACHE_MAX_BYTES:
+            break
+        if path == cache_path:
+            continue
+        try:
+            path.unlink()
+            total -= size
+        except OSError:
+            pass
+
+
+def getimg_request(prompt, width=None, height=None, steps=None, output_format=None):
+    """Monta payload e cabeçalhos da chamada text-to-image; parâmetros ausentes vêm da configuração GETIMG_*."""
     payload = {
         "prompt": prompt,
-        "width": 768,
-        "height": 1280,
-        "steps": 4,
-        "output_format": "jpeg",
+        "width": width or GETIMG_WIDTH,
+        "height": height or GETIMG_HEIGHT,
+        "steps": steps or GETIMG_STEPS,
+        "output_format": output_format or GETIMG_OUTPUT_FORMAT,
         "response_format": "url"
     }
 
@@ -247,8 +1405,35 @@ def generate_image(prompt):
         "content-type": "application/json",
         "Authorization": f"Bearer {GETIMG_API_KEY}"
     }
+    return payload, headers
+
+
+def cached_image_for(payload):
+    """Devolve (caminho no cache, bytes em cache ou None) para o payload; caminho é None com o cache desligado."""
+    if not IMAGE_CACHE:
+        return None, None
+    cache_path = image_cache_path(
+        payload['prompt'], payload['width'], payload['height'], payload['steps'], payload['output_format']
+    )
+    image_bytes = load_cached_image(cache_path)
+    if image_bytes is not None:
+        trace_add(cached=1)
+        print(f"Imagem encontrada no cache: {cache_path.name}")
+    return cache_path, image_bytes
 
-    response = requests.post(url, headers=headers, json=payload)
+
+@traced('image')
+def fetch_image_bytes(prompt, width=None, height=None, steps=None, output_format=None):
+    """Gera a imagem na GetIMG e devolve os bytes baixados (ou None em caso de erro)."""
+    payload, headers = getimg_request(prompt, width, height, steps, output_format)
+    cache_path, image_bytes = cached_image_for(payload)
+    if image_bytes is not None:
+        return image_bytes
+
+    url = GETIMG_URL
+
+    # Em 429/5xx espera (Retry-After ou backoff) e tenta de novo, em vez de perder a imagem
+    response = GETIMG_LIMITER.run(lambda: http_post(url, headers=headers, json=payload))
 
     if response.status_code == 200:
         response_json = response.json()
@@ -256,10 +1441,12 @@ def generate_image(prompt):
         image_url = response_json.get('url')
         if image_url:
             # Download the image
-            image_response = requests.get(image_url)
+            image_response = http_get(image_url)
             if image_response.status_code == 200:
-                img = Image.open(io.BytesIO(image_response.content))
-                return img
+                trace_add(images=1)
+                if cache_path is not None:
+                    store_cached_image(cache_path, image_response.content)
+                return image_response.content
             else:
                 print(f"Error downloading image: {image_response.status_code}")
                 return None
@@ -271,33 +1458,579 @@ def generate_image(prompt):
         return None
 
 
+def generate_image(prompt):
+    image_bytes = fetch_image_bytes(prompt)
+    if image_bytes is None:
+        return None
+    return Image.open(io.BytesIO(image_bytes))
+
+
+@traced('image')
+async def fetch_image_bytes_async(session, prompt, width=None, height=None, steps=None, output_format=None):
+    """Versão assíncrona de fetch_image_bytes: a imagem é baixada em blocos assim que a URL é devolvida."""
+    payload, headers = getimg_request(prompt, width, height, steps, output_format)
+    cache_path, image_bytes = cached_image_for(payload)
+    if image_bytes is not None:
+        return image_bytes
+
+    response = await GETIMG_LIMITER.run_async(lambda: session.post(GETIMG_URL, headers=headers, json=payload))
+    try:
+        if response.status != 200:
+            print(f"Error generating image: {response.status} {await response.text()}")
+            return None
+        response_json = await response.json()
+    finally:
+        response.release()
+
+    image_url = response_json.get('url')
+    if not image_url:
+        print("No image URL returned in response.")
+        return None
+
+    async with session.get(image_url) as image_response:
+        if image_response.status != 200:
+            print(f"Error downloading image: {image_response.status}")
+            return None
+        image_bytes = bytearray()
+        async for chunk in image_response.content.iter_chunked(64 * 1024):
+            image_bytes.extend(chunk)
+    image_bytes = bytes(image_bytes)
+    trace_add(bytes=len(image_bytes), images=1)
+
+    if cache_path is not None:
+        store_cached_image(cache_path, image_bytes)
+    return image_bytes
+
+
+async def iter_images_async(prompts, **params):
+    """
+    Envia os prompts à GetIMG e produz (índice, bytes) na ordem em que ficam prontos.
+
+    `prompts` é uma lista ou um iterador de (índice, prompt) que pode bloquear entre um item e
+    outro (ex.: prompts montados a partir de iter_related_ideas); cada prompt é enviado assim que
+    chega. A concorrência real é limitada por GETIMG_LIMITER; imagens com erro não são produzidas.
+    """
+    timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+    # HTTP_POOL_SIZES limita as conexões por host também aqui (0 = sem limite por host)
+    connector = aiohttp.TCPConnector(
+        limit=max(1, GETIMG_MAX_CONCURRENCY) * 2,
+        limit_per_host=HTTP_POOL_SIZES.get(urlsplit(GETIMG_URL).hostname, 0),
+    )
+    async with aiohttp.ClientSession(
+        timeout=timeout, connector=connector, trace_configs=[async_http_trace_config()]
+    ) as session:
+        async def fetch(i, prompt):
+            try:
+                return i, await fetch_image_bytes_async(session, prompt, **params)
+            except Exception as e:
+                print(f"Erro ao gerar imagem {i}: {e}")
+                return i, None
+
+        loop = asyncio.get_running_loop()
+        source = iter(prompts)
+        # O próximo prompt é lido numa thread, para não travar os downloads em andamento
+        next_prompt = loop.run_in_executor(None, next, source, None)
+        tasks = set()
+        try:
+            while next_prompt is not None or tasks:
+                waiting = tasks | {next_prompt} if next_prompt is not None else tasks
+                finished, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                if next_prompt in finished:
+                    finished.discard(next_prompt)
+                    item = next_prompt.result()
+                    if item is None:
+                        next_prompt = None
+                    else:
+                        tasks.add(asyncio.ensure_future(fetch(*item)))
+                        next_prompt = loop.run_in_executor(None, next, source, None)
+                for task in finished:
+                    tasks.discard(task)
+                    i, image_bytes = task.result()
+                    if image_bytes:
+                        yield i, image_bytes
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def variant_path(path, width):
+    """Caminho da variante responsiva: foto.webp -> foto-384w.webp (mesmo tipo do caminho recebido)."""
+    root, ext = os.path.splitext(str(path))
+    variant = f"{root}-{width}w{ext}"
+    return Path(variant) if isinstance(path, Path) else variant
+
+
+def encode_webp_image(image, preset=None, variants=()):
+    """
+    Codifica a imagem e suas variantes responsivas numa única passada.
+
+    Larguras maiores ou iguais à original reutilizam o WebP principal (não há ampliação).
+    :return: (bytes do WebP principal, {largura: bytes da variante})
+    """
+    if image.mode in ("RGBA", "P"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    convert_to_webp(image, buffer, preset=preset)
+    webp_data = buffer.getvalue()
+
+    variant_data = {}
+    for width in variants:
+        if width >= image.width:
+            variant_data[width] = webp_data
+            continue
+        resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        buffer = io.BytesIO()
+        convert_to_webp(resized, buffer, preset=preset)
+        variant_data[width] = buffer.getvalue()
+    return webp_data, variant_data
+
+
+def encode_webp_file(image_bytes, output_path, preset=None, variants=()):
+    """Decodifica os bytes JPEG e grava o WebP e as variantes. Executado no pool de processos."""
+    webp_data, variant_data = encode_webp_image(Image.open(io.BytesIO(image_bytes)), preset, variants)
+    Path(output_path).write_bytes(webp_data)
+    variant_files = {}
+    for width, data in variant_data.items():
+        variant_files[width] = variant_path(output_path, width)
+        Path(variant_files[width]).write_bytes(data)
+    return output_path, variant_files
+
+
+def encode_webp_bytes(image_bytes, preset=None, variants=()):
+    """Decodifica os bytes JPEG e devolve o WebP e as variantes em memória. Executado no pool de processos."""
+    return encode_webp_image(Image.open(io.BytesIO(image_bytes)), preset, variants)
+
+
 # ========================
 # Generate Blog Content
 # ========================
 
-def upload_to_server(local_path, remote_path, server, username, password):
-    """Faz upload do arquivo local para o servidor remoto via SSH."""
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    print(f"Conectando ao servidor: {server} como usuário: {username}")
-    
-    try:
-        # Conecta ao servidor
-        ssh.connect(server, username=username, password=password)
+class SFTPPool:
+    """Pool de sessões SFTP sobre uma única conexão SSH persistente, com keepalive e reconexão."""
+
+    def __init__(self, server, username, password, size=SFTP_POOL_SIZE, keepalive=SFTP_KEEPALIVE):
+        self.server = server
+        self.username = username
+        self.password = password
+        self.keepalive = keepalive
+        self._ssh = None
+        self._lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self._checked_dirs = set()
+        self._dirs_lock = threading.Lock()
+
+    def _is_active(self):
+        transport = self._ssh.get_transport() if self._ssh else None
+        return transport is not None and transport.is_active()
+
+    def _connect(self):
+        """Abre (ou reabre) a conexão SSH. Deve ser chamado com self._lock adquirido."""
+        if self._ssh is not None:
+            self._ssh.close()
+        print(f"Conectando ao servidor: {self.server} como usuário: {self.username}")
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        ssh.connect(self.server, port=SFTP_PORT, username=self.username, password=self.password)
+        ssh.get_transport().set_keepalive(self.keepalive)
+        self._ssh = ssh
+
+    def _open_sftp(self):
+        with self._lock:
+            if not self._is_active():
+                self._connect()
+            return self._ssh.open_sftp()
+
+    @contextmanager
+    def sftp(self):
+        """Empresta uma sessão SFTP do pool, abrindo uma nova se necessário."""
+        self._slots.acquire()
+        sftp = None
+        try:
+            try:
+                sftp = self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if sftp is None or sftp.get_channel().closed or not self._is_active():
+                sftp = self._open_sftp()
+            yield sftp
+            self._idle.put(sftp)
+            sftp = None
+        finally:
+            if sftp is not None:
+                # Sessão com erro: descarta para não reutilizá-la
+                try:
+                    sftp.close()
+                except Exception:
+                    pass
+            self._slots.release()
+
+    def put(self, source, remote_path, attempts=2):
+        """
+        Envia um arquivo, reconectando e tentando novamente em caso de falha.
+
+        :param source: Caminho local ou bytes do arquivo (enviados com putfo, sem passar pelo disco)
+        """
+        for attempt in range(1, attempts + 1):
+            if attempt > 1:
+                trace_add(retries=1)
+            try:
+                with self.sftp() as sftp:
+                    if isinstance(source, (bytes, bytearray)):
+                        attributes = sftp.putfo(io.BytesIO(source), remote_path)
+                    else:
+                        attributes = sftp.put(source, remote_path)
+                trace_add(bytes=attributes.st_size)
+                return True
+            except Exception as e:
+                print(f"Erro ao conectar ou transferir arquivo (tentativa {attempt} de {attempts}): {e}")
+        return False
+
+    def _makedirs(self, sftp, remote_dir):
+        """Cria o diretório remoto e os pais que faltarem, como `mkdir -p`."""
+        missing = []
+        path = remote_dir
+        while path not in ('', '/') and path not in self._checked_dirs:
+            try:
+                sftp.stat(path)
+                break
+            except IOError:
+                missing.append(path)
+                path = posixpath.dirname(path)
+        for path in reversed(missing):
+            print(f"Criando diretório remoto: {path}")
+            try:
+                sftp.mkdir(path)
+            except IOError:
+                # Outro processo pode ter criado o diretório entre o stat e o mkdir
+                sftp.stat(path)
+            self._checked_dirs.add(path)
+        self._checked_dirs.add(remote_dir)
+
+    def ensure_remote_dirs(self, remote_dirs, attempts=2):
+        """
+        Verifica (e cria, se preciso) os diretórios remotos uma única vez por execução.
+
+        Usa a mesma reconexão de put(). Não lança exceções: devolve o conjunto de
+        diretórios que não puderam ser verificados nem criados.
+        """
+        with self._dirs_lock:
+            pending = [d for d in remote_dirs if d not in self._checked_dirs]
+            for attempt in range(1, attempts + 1):
+                if not pending:
+                    break
+                if attempt > 1:
+                    trace_add(retries=1)
+                try:
+                    with self.sftp() as sftp:
+                        while pending:
+                            self._makedirs(sftp, pending[0])
+                            pending.pop(0)
+                except Exception as e:
+                    print(f"Erro ao verificar diretório remoto {pending[0]} (tentativa {attempt} de {attempts}): {e}")
+            return set(pending)
+
+    def close(self):
+        with self._lock:
+            while not self._idle.empty():
+                try:
+                    self._idle.get_nowait().close()
+                except Exception:
+                    pass
+            if self._ssh is not None:
+                self._ssh.close()
+                self._ssh = None
+
+
+_sftp_pools = {}
+_sftp_pools_lock = threading.Lock()
+
+
+def get_sftp_pool(server=SFTP_SERVER, username=SFTP_USERNAME, password=SFTP_PASSWORD):
+    """Devolve o pool SFTP compartilhado para o servidor/usuário, criando-o na primeira chamada."""
+    with _sftp_pools_lock:
+        pool = _sftp_pools.get((server, username))
+        if pool is None:
+            pool = _sftp_pools[(server, username)] = SFTPPool(server, username, password)
+        return pool
+
+
+def close_sftp_pools():
+    """Fecha todas as conexões SSH abertas pelos pools."""
+    with _sftp_pools_lock:
+        for pool in _sftp_pools.values():
+            pool.close()
+        _sftp_pools.clear()
+
+
+def upload_to_server(local_path, remote_path, server, username, password, data=None):
+    """Faz upload do arquivo local (ou de `data`, se informado) para o servidor remoto via SSH, reutilizando a conexão do pool."""
+    source = data if data is not None else local_path
+    return get_sftp_pool(server, username, password).put(source, remote_path)
+
+
+@traced('upload')
+def upload_batch(files, server, username, password):
+    """
+    Envia todas as imagens de um post em paralelo, usando os canais do pool SFTP.
 
-        # Inicia SFTP para transferência de arquivos
-        sftp = ssh.open_sftp()
-        sftp.put(local_path, remote_path)
-        # print(f"Arquivo enviado: {local_path} -> {remote_path}")
+    :param files: Lista de tuplas (origem, caminho_remoto); a origem é um caminho local ou os bytes do arquivo
+    :return: Dicionário com arquivos enviados, bytes, duração, bytes/s e latência por arquivo
+    """
+    pool = get_sftp_pool(server, username, password)
+    failed_dirs = pool.ensure_remote_dirs(sorted({posixpath.dirname(remote_path) for _, remote_path in files}))
+
+    def send(source, remote_path):
+        start = time.perf_counter()
+        # Arquivos cujo diretório não pôde ser criado contam como falhas, sem derrubar o post
+        ok = posixpath.dirname(remote_path) not in failed_dirs and pool.put(source, remote_path)
+        size = len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+        return remote_path, ok, size, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, SFTP_POOL_SIZE)) as executor:
+        # Cada envio roda no contexto atual, para os bytes entrarem na etapa de upload do post
+        futures = [executor.submit(contextvars.copy_context().run, send, *f) for f in files]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    sent = [r for r in results if r[1]]
+    total_bytes = sum(r[2] for r in sent)
+    latencies = {r[0]: r[3] for r in results}
+    stats = {
+        "files": len(sent),
+        "failed": len(results) - len(sent),
+        "bytes": total_bytes,
+        "seconds": elapsed,
+        "bytes_per_second": total_bytes / elapsed if elapsed > 0 else 0.0,
+        "latencies": latencies,
+    }
+    print(
+        f"Lote enviado: {stats['files']} arquivos ({stats['failed']} falhas), "
+        f"{total_bytes / 1024:.1f} KB em {elapsed:.2f}s ({stats['bytes_per_second'] / 1024:.1f} KB/s)"
+    )
+    for remote_path, latency in latencies.items():
+        print(f"  {remote_path}: {latency * 1000:.0f} ms")
+    return stats
 
-        sftp.close()
-        ssh.close()
-    except Exception as e:
-        print(f"Erro ao conectar ou transferir arquivo: {e}")
+
+_encode_pool = None
+_encode_pool_lock = threading.Lock()
+
+
+def get_encode_pool():
+    """
+    Devolve o pool de processos compartilhado para a conversão WebP.
+
+    O pool nasce numa thread do pipeline, com as threads de HTTP, SFTP e GPT já rodando; com
+    fork, um filho poderia herdar um lock ocupado e travar. Por isso os processos saem de um
+    forkserver (ou spawn, onde não houver forkserver).
+    """
+    global _encode_pool
+    with _encode_pool_lock:
+        if _encode_pool is None:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _encode_pool = ProcessPoolExecutor(
+                max_workers=max(1, WEBP_ENCODE_WORKERS),
+                mp_context=multiprocessing.get_context(start_method),
+            )
+        return _encode_pool
+
+
+def image_paths_for(title, i, images_dir, featured_images_dir, remote_images_dir, remote_featured_images_dir):
+    """Calcula nome, caminho local e caminho remoto da imagem i (a imagem 1 é a destacada)."""
+    local_image_filename = f"{sanitize_filename(title)}_{i}.webp"
+    local_image_path = (featured_images_dir if i == 1 else images_dir) / local_image_filename
+    remote_image_path = (
+        f"{remote_featured_images_dir}/{local_image_filename}"
+        if i == 1 else
+        f"{remote_images_dir}/{local_image_filename}"
+    )
+    return local_image_filename, local_image_path, remote_image_path
+
+
+def archive_webp(i, webp_data, local_image_path):
+    """Grava a cópia local do WebP em memória quando o arquivamento está ativo (sempre para a destacada)."""
+    if ARCHIVE_IMAGES or i == 1:
+        with open(local_image_path, 'wb') as f:
+            f.write(webp_data)
+
+
+@traced('webp')
+def encode_image(i, image_bytes, paths):
+    """
+    Converte a imagem i no pool de processos (preset WEBP_PRESET e variantes WEBP_VARIANTS).
+
+    :return: paths + (webp_data, variantes), onde variantes é uma lista de (origem, caminho_remoto)
+             e a origem é o caminho local ou os bytes em memória
+    """
+    encode_pool = get_encode_pool()
+    variants = []
+    if IN_MEMORY_IMAGES:
+        webp_data, variant_data = encode_pool.submit(encode_webp_bytes, image_bytes, WEBP_PRESET, WEBP_VARIANTS).result()
+        archive_webp(i, webp_data, paths[1])
+        for width, data in variant_data.items():
+            if ARCHIVE_IMAGES:
+                variant_path(paths[1], width).write_bytes(data)
+            variants.append((data, variant_path(paths[2], width)))
+    else:
+        webp_data = None
+        _, variant_files = encode_pool.submit(encode_webp_file, image_bytes, paths[1], WEBP_PRESET, WEBP_VARIANTS).result()
+        for width, local_path in variant_files.items():
+            variants.append((str(local_path), variant_path(paths[2], width)))
+    return paths + (webp_data, variants)
+
+
+@traced('upload')
+def upload_image(entry):
+    """Envia a imagem e suas variantes pelo pool SFTP. Devolve True se todos os arquivos foram enviados."""
+    ok = upload_to_server(
+        local_path=str(entry[1]),
+        remote_path=entry[2],
+        server=SFTP_SERVER,
+        username=SFTP_USERNAME,
+        password=SFTP_PASSWORD,
+        data=entry[3]
+    )
+    for source, remote_path in entry[4]:
+        ok = get_sftp_pool(SFTP_SERVER, SFTP_USERNAME, SFTP_PASSWORD).put(source, remote_path) and ok
+    return ok
 
 
+def promote_featured(title, entry, dirs, upload=True):
+    """
+    Copia a imagem de `entry` para a posição da destacada (usado quando a ideia 1 falhou).
+
+    As variantes continuam nos caminhos originais. Devolve a nova entrada.
+    """
+    local_image_filename, local_image_path, remote_image_path = image_paths_for(title, 1, *dirs)
+    if entry[3] is not None:
+        local_image_path.write_bytes(entry[3])
+    else:
+        shutil.copyfile(entry[1], local_image_path)
+    promoted = (local_image_filename, local_image_path, remote_image_path, entry[3], [])
+    if upload:
+        upload_image(promoted)
+    return promoted
+
+
+def run_image_pipeline(title, ideas_with_descriptions, dirs, upload=True):
+    """
+    Executa geração, conversão e upload das imagens em estágios sobrepostos.
+
+    `ideas_with_descriptions` é um iterável de (número, ideia); pode ser o fluxo de
+    iter_related_ideas, e nesse caso cada imagem começa assim que sua ideia chega.
+
+    As imagens são pedidas à GetIMG de uma vez pelo cliente assíncrono (ou por threads com
+    GETIMG_ASYNC=0), um pool de processos converte para WebP e
+    threads de upload (uma por canal SFTP) enviam os arquivos; os estágios são ligados
+    por filas limitadas.
+    Com upload=False o último estágio apenas registra as imagens (envio em lote depois).
+    Devolve um dicionário {i: (local_image_filename, local_image_path, remote_image_path, webp_data, variants)}
+    apenas com as imagens concluídas; webp_data só é preenchido com IN_MEMORY_IMAGES e variants
+    lista as variantes responsivas como (origem, caminho_remoto).
+    """
+    encode_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    upload_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    done = {}
+    num_encoders = max(1, WEBP_ENCODE_WORKERS)
+
+    def fetch(i, item):
+        image_prompt = generate_image_prompt(title, item['idea'], item['description'])
+        image_bytes = fetch_image_bytes(image_prompt)
+        if image_bytes:
+            encode_queue.put((i, image_bytes))
+
+    async def fetch_all_async():
+        # Cada prompt sai assim que a ideia chega; cada imagem vai para a fila de conversão assim que fica pronta
+        prompts = (
+            (i, generate_image_prompt(title, item['idea'], item['description']))
+            for i, item in ideas_with_descriptions
+        )
+        loop = asyncio.get_running_loop()
+        async for job in iter_images_async(prompts):
+            # put bloqueia quando a fila está cheia; fora do loop para não travar os downloads
+            await loop.run_in_executor(None, encode_queue.put, job)
+
+    def encoder():
+        while True:
+            job = encode_queue.get()
+            if job is None:
+                break
+            i, image_bytes = job
+            try:
+                entry = encode_image(i, image_bytes, image_paths_for(title, i, *dirs))
+            except Exception as e:
+                print(f"Erro ao converter imagem {i} para WebP: {e}")
+                continue
+            upload_queue.put((i, entry))
+
+    def uploader():
+        while True:
+            job = upload_queue.get()
+            if job is None:
+                break
+            i, entry = job
+            if upload:
+                upload_image(entry)
+            done[i] = entry
+
+    # As threads herdam o contexto do post para o rastreamento das etapas
+    encoders = [
+        threading.Thread(target=contextvars.copy_context().run, args=(encoder,), daemon=True)
+        for _ in range(num_encoders)
+    ]
+    # Um uploader por canal SFTP do pool
+    uploaders = [
+        threading.Thread(target=contextvars.copy_context().run, args=(uploader,), daemon=True)
+        for _ in range(max(1, SFTP_POOL_SIZE))
+    ]
+    for thread in encoders + uploaders:
+        thread.start()
+
+    if GETIMG_ASYNC:
+        asyncio.run(fetch_all_async())
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, IMAGE_FETCH_WORKERS)) as fetch_pool:
+            futures = [
+                fetch_pool.submit(contextvars.copy_context().run, fetch, i, item)
+                for i, item in ideas_with_descriptions
+            ]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Erro ao gerar imagem: {e}")
+
+    for _ in encoders:
+        encode_queue.put(None)
+    for thread in encoders:
+        thread.join()
+    for _ in uploaders:
+        upload_queue.put(None)
+    for thread in uploaders:
+        thread.join()
+
+    return done
+
+
+def generate_blog_content(title, ideas_with_descriptions, theme, main_description=None):
+    """
+    Gera imagens, envia-as e monta o conteúdo do post.
+
+    `ideas_with_descriptions` é a lista de ideias ou o fluxo de (número, ideia) de
+    iter_related_ideas; com o fluxo, cada imagem começa assim que sua ideia chega e a
+    descrição principal é gerada em paralelo. As ideias recebidas ficam em content['source_ideas'].
+    """
+    if isinstance(ideas_with_descriptions, list):
+        ideas_with_descriptions = enumerate(ideas_with_descriptions, 1)
+    received = {}
+
+    def track(ideas):
+        for i, item in ideas:
+            received[i] = item
+            yield i, item
 
-def generate_blog_content(title, ideas_with_descriptions, theme):
     # Caminhos locais
     local_media_root = Path.home() / "media"
     images_dir = local_media_root / "images"
@@ -311,6 +2044,7 @@ def generate_blog_content(title, ideas_with_descriptions, theme):
     remote_media_root = "/srv/media"
     remote_images_dir = f"{remote_media_root}/images"
     remote_featured_images_dir = f"{remote_media_root}/featured_images"
+    dirs = (images_dir, featured_images_dir, remote_images_dir, remote_featured_images_dir)
 
     # Inicializar conteúdo
     content = {
@@ -321,51 +2055,79 @@ def generate_blog_content(title, ideas_with_descriptions, theme):
     featured_image_local_path = None
     featured_image_remote_path = None
 
-    # Gerar main_description (limitada a 155 caracteres)
-    main_description = generate_main_description(theme, title)
+    batch_upload = UPLOAD_MODE == 'batch'
+
+    # Gerar main_description (limitada a 155 caracteres) em paralelo com as imagens, se ainda não foi gerada
+    with ThreadPoolExecutor(max_workers=1) as description_pool:
+        if main_description is None:
+            description_future = description_pool.submit(
+                contextvars.copy_context().run, generate_main_description, theme, title
+            )
+        else:
+            description_future = None
+
+        if IMAGE_PIPELINE:
+            completed = run_image_pipeline(title, track(ideas_with_descriptions), dirs, upload=not batch_upload)
+        else:
+            completed = {}
+            for i, item in track(ideas_with_descriptions):
+                image_prompt = generate_image_prompt(title, item['idea'], item['description'])
+                image_bytes = fetch_image_bytes(image_prompt)
+                if not image_bytes:
+                    continue
+
+                # Conversão no pool de processos, fora da thread principal
+                entry = encode_image(i, image_bytes, image_paths_for(title, i, *dirs))
+
+                # Upload para o servidor
+                if not batch_upload:
+                    upload_image(entry)
+                completed[i] = entry
+
+        if description_future is not None:
+            main_description = description_future.result()
     content["main_description"] = main_description
 
     # Usar main_description como meta_description
     content["meta_description"] = main_description
 
-    for i, item in enumerate(ideas_with_descriptions, 1):
-        idea = item['idea']
-        description = item['description']
-        image_prompt = generate_image_prompt(title, idea, description)
-        image = generate_image(image_prompt)
-
-        if image:
-            local_image_filename = f"{sanitize_filename(title)}_{i}.webp"
-            local_image_path = (featured_images_dir if i == 1 else images_dir) / local_image_filename
-            convert_to_webp(image, local_image_path)
-
-
-            # Caminho remoto
-            remote_image_path = (
-                f"{remote_featured_images_dir}/{local_image_filename}"
-                if i == 1 else
-                f"{remote_images_dir}/{local_image_filename}"
-            )
-
-            # Upload para o servidor
-            upload_to_server(
-                local_path=str(local_image_path),
-                remote_path=remote_image_path,
-                server="srv643463.hstgr.cloud",  # Ou "217.21.78.21"
-                username="root",
-                password=":6S39:g==Mb[w6l2Ua9Y"
-            )
+    numbers = sorted(received)
+    content["source_ideas"] = [received[n] for n in numbers]
+
+    # Se a ideia 1 não chegou, a primeira ideia recebida vira a destacada
+    if numbers and numbers[0] != 1 and numbers[0] in completed:
+        completed[numbers[0]] = promote_featured(title, completed[numbers[0]], dirs, upload=not batch_upload)
+
+    if batch_upload and completed:
+        files = []
+        for i in sorted(completed):
+            entry = completed[i]
+            files.append((entry[3] if entry[3] is not None else str(entry[1]), entry[2]))
+            files.extend(entry[4])
+        upload_batch(
+            files,
+            server=SFTP_SERVER,
+            username=SFTP_USERNAME,
+            password=SFTP_PASSWORD
+        )
 
-            content["ideas"].append({
-                "title": f"{i}. {idea}",
-                "description": description,
-                "image_url": f"/media/featured_images/{local_image_filename}" if i == 1 else f"/media/images/{local_image_filename}"
-            })
+    # Montar as ideias na ordem original, apenas com as imagens concluídas
+    for i, n in enumerate(numbers, 1):
+        if n not in completed:
+            continue
+        item = received[n]
+        local_image_filename, local_image_path, remote_image_path, webp_data, _ = completed[n]
 
+        content["ideas"].append({
+            "title": f"{i}. {item['idea']}",
+            "description": item['description'],
+            "image_url": f"/media/featured_images/{local_image_filename}" if i == 1 else f"/media/images/{local_image_filename}"
+        })
 
-            if i == 1:
-                featured_image_local_path = str(local_image_path)  # Caminho local da imagem destacada
-                featured_image_remote_path = remote_image_path     # Caminho remoto da imagem destacada
+        if i == 1:
+            featured_image_local_path = str(local_image_path)  # Caminho local da imagem destacada
+            featured_image_remote_path = remote_image_path     # Caminho remoto da imagem destacada
+            content["featured_image_data"] = webp_data         # WebP em memória (None no modo em disco)
 
     return content, featured_image_local_path, featured_image_remote_path
 
@@ -387,63 +2149,305 @@ import json
 
 
 # script-django.py
-def publish_to_django(title, content, main_description, meta_description, ideas, featured_image_path=None, theme_slug=None, token_autenticacao=None):
-    url = 'https://www.dailydecorideas.com/api/api_posts/'
-    headers = {
+def django_headers(token_autenticacao):
+    return {
         'Authorization': f'Token {token_autenticacao}' if token_autenticacao else '',
     }
 
-    slug = slugify(title)[:50]
 
-    # Prepare data
+def django_post_fields(title, content, main_description, meta_description, ideas, theme_slug=None):
+    """Campos do post enviados ao Django (ideias como lista; o envio individual as serializa em JSON)."""
     data = {
         'title': title,
         'content': content,  # Conteúdo principal do post (limitado a 155 caracteres)
         'main_description': main_description,
         'meta_description': meta_description,  # Também limitado a 155 caracteres
-        'ideas': json.dumps(ideas),
+        'ideas': ideas,
     }
 
-    # Para temas, garantir que seja uma lista de slugs
-    if theme_slug:
-        data['themes'] = theme_slug if isinstance(theme_slug, list) else [theme_slug]
+    # Para temas, garantir que seja uma lista de slugs
+    if theme_slug:
+        data['themes'] = theme_slug if isinstance(theme_slug, list) else [theme_slug]
+    return data
+
+
+def featured_image_source(featured_image_path=None, featured_image_data=None):
+    """Devolve (nome do arquivo, bytes ou caminho local) da imagem destacada, ou None se não houver imagem."""
+    if featured_image_data is not None:
+        # Envia o WebP direto do buffer em memória, sem reler o arquivo
+        filename = os.path.basename(featured_image_path) if featured_image_path else 'featured_image.webp'
+        return filename, featured_image_data
+    if featured_image_path and os.path.exists(featured_image_path):
+        return os.path.basename(featured_image_path), featured_image_path
+    print(f"Erro: O caminho da imagem destacada '{featured_image_path}' não existe ou não é acessível.")
+    return None
+
+
+def publish_to_django(title, content, main_description, meta_description, ideas, featured_image_path=None, theme_slug=None, token_autenticacao=None, featured_image_data=None):
+    url = f'{DJANGO_API_URL}/api_posts/'
+    headers = django_headers(token_autenticacao)
+
+    slug = slugify(title)[:50]
+
+    # Prepare data
+    data = django_post_fields(title, content, main_description, meta_description, ideas, theme_slug)
+    data['ideas'] = json.dumps(ideas)
+
+    # Prepare files dictionary
+    files = {}
+    image = featured_image_source(featured_image_path, featured_image_data)
+    if image is not None:
+        filename, source = image
+        if isinstance(source, bytes):
+            files['featured_image'] = (filename, io.BytesIO(source), 'image/webp')
+        else:
+            files['featured_image'] = open(source, 'rb')
+
+    # print("Data being sent to the server:")
+    # print(json.dumps(data, indent=2))  # Pretty-print JSON data
+    # print("Files being sent to the server:")
+    # print(files)
+
+    # Enviar a requisição POST
+    try:
+        response = http_post(url, headers=headers, data=data, files=files)
+    finally:
+        # Fechar o arquivo após a requisição
+        for file in files.values():
+            if not isinstance(file, tuple):
+                file.close()
+
+    if response.status_code == 201:
+        print('Postagem e ideias criadas com sucesso!')
+    else:
+        print(f'Erro ao criar postagem: {response.status_code}')
+        print(f'Resposta do servidor: {response.text}')
+    return response
+
+
+class MultipartStream:
+    """
+    Corpo multipart/form-data lido sob demanda: as imagens em disco são enviadas em blocos, sem montar
+    a requisição inteira em memória. O tamanho é calculado antes (Content-Length, sem chunked) e o
+    objeto pode ser percorrido de novo se a requisição for repetida.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, fields, files):
+        """
+        :param fields: Lista de (nome, valor texto)
+        :param files: Lista de (nome, nome do arquivo, bytes ou caminho local, content type)
+        """
+        self.boundary = f"----blogautomation{os.urandom(12).hex()}"
+        self.parts = []
+        for name, value in fields:
+            header = f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+            self.parts.append((header.encode('utf-8'), value.encode('utf-8')))
+        for name, filename, source, content_type in files:
+            filename = filename.replace('"', '%22')
+            header = (
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n'
+            )
+            self.parts.append((header.encode('utf-8'), source))
+        self.closing = f'--{self.boundary}--\r\n'.encode('utf-8')
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        total = len(self.closing)
+        for header, source in self.parts:
+            size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+            total += len(header) + size + 2
+        return total
+
+    def __iter__(self):
+        for header, source in self.parts:
+            yield header
+            if isinstance(source, bytes):
+                yield source
+            else:
+                with open(source, 'rb') as f:
+                    for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                        yield chunk
+            yield b'\r\n'
+        yield self.closing
+
+
+def publish_batch_to_django(posts, token_autenticacao):
+    """
+    Envia vários posts numa única requisição a /api_posts/batch/.
+
+    O corpo tem um campo `manifest` (JSON com os posts, cada um com `ref` e o nome do campo da
+    sua imagem destacada) seguido das imagens. A resposta traz um resultado por `ref`.
+
+    :param posts: Lista de dicionários com os argumentos de publish_to_django
+    :return: Lista alinhada com `posts` de (status, dados da resposta do item), ou None se o
+             endpoint de lote não existir no servidor
+    """
+    url = f'{DJANGO_API_URL}/api_posts/batch/'
+    headers = django_headers(token_autenticacao)
+
+    manifest = []
+    files = []
+    for ref, post in enumerate(posts):
+        item = django_post_fields(
+            post['title'], post['content'], post['main_description'], post['meta_description'],
+            post['ideas'], post.get('theme_slug')
+        )
+        item['ref'] = str(ref)
+        image = featured_image_source(post.get('featured_image_path'), post.get('featured_image_data'))
+        if image is not None:
+            item['featured_image'] = f'featured_image_{ref}'
+            files.append((item['featured_image'], image[0], image[1], 'image/webp'))
+        manifest.append(item)
+
+    body = MultipartStream([('manifest', json.dumps({'posts': manifest}))], files)
+    headers['Content-Type'] = body.content_type
+    response = http_post(url, headers=headers, data=body)
+
+    if response.status_code in (404, 405):
+        return None
+    if response.status_code not in (200, 207):
+        print(f'Erro ao criar lote de postagens: {response.status_code}')
+        print(f'Resposta do servidor: {response.text}')
+        return [(response.status_code, {'error': response.text})] * len(posts)
+
+    results = {str(item.get('ref')): item for item in response.json().get('results', [])}
+    outcome = []
+    for ref in range(len(posts)):
+        item = results.get(str(ref))
+        if item is None:
+            outcome.append((None, {'error': 'sem resultado para o item'}))
+            continue
+        if item.get('status') != 201:
+            print(f"Erro ao criar postagem '{posts[ref]['title']}' do lote: {item.get('status')} {item.get('errors')}")
+        outcome.append((item.get('status'), item))
+    created = sum(1 for status, _ in outcome if status == 201)
+    print(f'Lote enviado ao Django: {created} de {len(posts)} postagens criadas.')
+    return outcome
+
+
+class DjangoBatchPublisher:
+    """
+    Junta os posts prontos das threads de run_posts e publica-os em lote.
+
+    O lote é enviado quando atinge `batch_size` posts ou `max_wait` segundos após o primeiro
+    post da fila. Itens com falha temporária (5xx ou sem resultado) são reenviados um a um pelo
+    endpoint individual; se o servidor não tiver o endpoint de lote, todos passam a ser individuais.
+    """
+
+    def __init__(self, token_autenticacao, batch_size=None, max_wait=None):
+        self.token = token_autenticacao
+        self.batch_size = max(1, batch_size or DJANGO_BATCH_SIZE)
+        self.max_wait = DJANGO_BATCH_WAIT if max_wait is None else max_wait
+        self.batch_supported = True
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+
+    def publish(self, **post):
+        """Enfileira o post (argumentos de publish_to_django) e aguarda o resultado: (status, dados)."""
+        future = Future()
+        with self._lock:
+            self._pending.append((post, future))
+            if len(self._pending) >= self.batch_size:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.max_wait, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if batch:
+            self._send(batch)
+        return future.result()
+
+    def flush(self):
+        """Envia imediatamente os posts pendentes."""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._send(batch)
+
+    def _take(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _send(self, batch):
+        posts = [post for post, _ in batch]
+        try:
+            results = publish_batch_to_django(posts, self.token) if self.batch_supported and len(posts) > 1 else None
+            if results is None and len(posts) > 1 and self.batch_supported:
+                print("Endpoint de lote indisponível no Django; publicando um post por requisição.")
+                self.batch_supported = False
+            if results is None:
+                results = [(None, None)] * len(posts)
+
+            for (post, future), (status, data) in zip(batch, results):
+                if status is None or status >= 500:
+                    # Falha temporária ou sem lote: reenvia apenas este post
+                    response = publish_to_django(token_autenticacao=self.token, **post)
+                    status = response.status_code
+                    data = response.json() if status == 201 else {'error': response.text}
+                future.set_result((status, data))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
 
-    # Prepare files dictionary
-    files = {}
-    if featured_image_path and os.path.exists(featured_image_path):
-        files['featured_image'] = open(featured_image_path, 'rb')
-    else:
-        print(f"Erro: O caminho da imagem destacada '{featured_image_path}' não existe ou não é acessível.")
 
-    # print("Data being sent to the server:")
-    # print(json.dumps(data, indent=2))  # Pretty-print JSON data
-    # print("Files being sent to the server:")
-    # print(files)
+_django_batcher = None
+_django_batcher_lock = threading.Lock()
 
-    # Enviar a requisição POST
-    response = requests.post(url, headers=headers, data=data, files=files)
 
-    # Fechar o arquivo após a requisição
-    if 'featured_image' in files:
-        files['featured_image'].close()
+def get_django_batcher(token_autenticacao):
+    """Devolve o DjangoBatchPublisher compartilhado pela execução."""
+    global _django_batcher
+    with _django_batcher_lock:
+        if _django_batcher is None:
+            _django_batcher = DjangoBatchPublisher(token_autenticacao)
+        return _django_batcher
 
-    if response.status_code == 201:
-        print('Postagem e ideias criadas com sucesso!')
-    else:
-        print(f'Erro ao criar postagem: {response.status_code}')
-        print(f'Resposta do servidor: {response.text}')
-    return response
+
+def close_django_batcher():
+    """Envia os posts que ainda estiverem na fila do lote."""
+    global _django_batcher
+    with _django_batcher_lock:
+        batcher, _django_batcher = _django_batcher, None
+    if batcher is not None:
+        batcher.flush()
 
 # ========================
 # Publish on Pinterest
 # ========================
 
-def initialize_webdriver():
-    """Inicializa o WebDriver do Selenium com opções personalizadas."""
+def initialize_webdriver(profile_slot=0):
+    """
+    Inicializa o WebDriver do Selenium com opções personalizadas.
+
+    :param profile_slot: Índice do perfil em CHROME_USER_DATA_DIR (cada driver do pool usa o seu)
+    """
     options = webdriver.ChromeOptions()
     options.add_argument('--start-maximized')
     # Opcional: Executar em modo headless (sem interface gráfica)
-    # options.add_argument('--headless')
+    if PINTEREST_HEADLESS:
+        options.add_argument('--headless=new')
+        options.add_argument('--window-size=1920,1080')
+        # Necessários em servidores Linux sem display / em contêineres
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-gpu')
+    # Perfil persistente: mantém a sessão do Pinterest entre execuções
+    if CHROME_USER_DATA_DIR:
+        options.add_argument(f'--user-data-dir={Path(CHROME_USER_DATA_DIR) / f"profile-{profile_slot}"}')
     # Desativar logs desnecessários
     options.add_argument('--log-level=3')
     # Desativar funcionalidades USB para evitar erros
@@ -455,8 +2459,58 @@ def initialize_webdriver():
     wait = WebDriverWait(driver, 30)  # Aumentado para 30 segundos para conexões mais lentas
     return driver, wait
 
-def login_pinterest(driver, wait, email, password):
-    """Faz login no Pinterest usando o WebDriver."""
+def save_pinterest_cookies(driver):
+    """Grava os cookies da sessão do Pinterest para reutilizá-los nas próximas execuções."""
+    if not PINTEREST_COOKIES_FILE:
+        return
+    try:
+        cookies_path = Path(PINTEREST_COOKIES_FILE)
+        cookies_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cookies_path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(driver.get_cookies()))
+        os.replace(tmp_path, cookies_path)
+    except Exception as e:
+        print("Erro ao gravar cookies do Pinterest:", e)
+
+
+def has_saved_pinterest_session(profile_slot=0):
+    """Indica se há cookies gravados ou um perfil persistente já usado, ou seja, se vale tentar restaurar a sessão."""
+    if PINTEREST_COOKIES_FILE and os.path.exists(PINTEREST_COOKIES_FILE):
+        return True
+    return bool(CHROME_USER_DATA_DIR) and (Path(CHROME_USER_DATA_DIR) / f"profile-{profile_slot}").is_dir()
+
+
+def restore_pinterest_session(driver, timeout=8):
+    """Tenta reaproveitar a sessão (perfil persistente ou cookies gravados). Devolve True se já estiver logado."""
+    try:
+        driver.get("https://www.pinterest.com/")
+        if PINTEREST_COOKIES_FILE and os.path.exists(PINTEREST_COOKIES_FILE):
+            with open(PINTEREST_COOKIES_FILE) as f:
+                for cookie in json.load(f):
+                    cookie.pop('sameSite', None)
+                    try:
+                        driver.add_cookie(cookie)
+                    except Exception:
+                        pass
+            driver.get("https://www.pinterest.com/")
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "[data-test-id='dynamic-menu-controller']"))
+        )
+        return True
+    except Exception:
+        return False
+
+
+def login_pinterest(driver, wait, email, password, restore=True):
+    """
+    Faz login no Pinterest usando o WebDriver, reaproveitando a sessão anterior quando ainda válida.
+
+    Com restore=False (sem cookies nem perfil salvos) vai direto ao formulário, sem a espera de restore_pinterest_session.
+    """
+    if restore and restore_pinterest_session(driver):
+        print('Sessão do Pinterest reutilizada, login dispensado.')
+        return
+
     try:
         print('Abrindo Pinterest para login...')
         driver.get("https://www.pinterest.com/login/")
@@ -474,6 +2528,7 @@ def login_pinterest(driver, wait, email, password):
         # Espera a página inicial após o login
         wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "[data-test-id='dynamic-menu-controller']")))
         print('Página inicial carregada após login.')
+        save_pinterest_cookies(driver)
 
     except Exception as e:
         print("Erro durante o login:", e)
@@ -481,6 +2536,71 @@ def login_pinterest(driver, wait, email, password):
         driver.quit()
         raise e
 
+class WebDriverPool:
+    """
+    Pool de WebDrivers pré-aquecidos: cada Chrome é iniciado e logado no Pinterest em segundo plano.
+
+    Os drivers além do primeiro ficam de reserva: quando um driver para de responder,
+    replace() o descarta e o próximo acquire() recebe um reserva já logado.
+    """
+
+    def __init__(self, size=WEBDRIVER_POOL_SIZE):
+        self.size = max(1, size)
+        self._ready = queue.Queue()
+        self._drivers = []
+        self._lock = threading.Lock()
+        self._alive = self.size  # perfis que ainda podem entregar um driver logado
+        self._executor = ThreadPoolExecutor(max_workers=self.size)
+        for slot in range(self.size):
+            self._executor.submit(self._warm, slot)
+
+    def _warm(self, slot):
+        try:
+            restore = has_saved_pinterest_session(slot)
+            driver, wait = initialize_webdriver(profile_slot=slot)
+            with self._lock:
+                self._drivers.append(driver)
+            login_pinterest(driver, wait, pinterest_email, pinterest_password, restore=restore)
+            self._ready.put((driver, wait, slot))
+        except Exception as e:
+            print(f"Erro ao preparar WebDriver {slot}:", e)
+            with self._lock:
+                self._alive -= 1
+
+    def acquire(self):
+        """Devolve (driver, wait, slot) assim que um driver estiver logado."""
+        while True:
+            with self._lock:
+                if self._alive <= 0 and self._ready.empty():
+                    raise RuntimeError("Nenhum WebDriver pôde ser iniciado.")
+            try:
+                return self._ready.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def replace(self, driver, slot):
+        """Descarta um driver com problema e prepara outro no mesmo perfil."""
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        self._executor.submit(self._warm, slot)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for driver in self._drivers:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+            self._drivers.clear()
+        print("WebDriver closed.")
+
+
 def verify_and_truncate_title(titulo, limite=100):
     """Verifica se o título excede o limite e o trunca se necessário."""
     print(f"Verificando título com {len(titulo)} caracteres.")
@@ -493,22 +2613,138 @@ def verify_and_truncate_title(titulo, limite=100):
         print("Título está dentro do limite.")
     return titulo
 
-def publish_on_pinterest(driver, wait, title, description, image_path, url, theme):
-    """Publishes a pin on Pinterest, selecting the board that matches the theme."""
-    if not image_path or not os.path.exists(image_path):
-        print("No valid image path provided. Skipping Pinterest publishing.")
-        return
-    
-    keywords = generate_keywords(title, theme)
+class PinPacer:
+    """Garante um intervalo mínimo (com variação aleatória) entre pins; o tempo gasto entre eles já conta."""
+
+    def __init__(self, min_interval=PIN_MIN_INTERVAL, jitter=PIN_INTERVAL_JITTER):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._next_at = 0.0
+
+    def wait_turn(self):
+        """Aguarda até o próximo pin ser permitido."""
+        delay = self._next_at - time.monotonic()
+        if delay > 0:
+            print(f'Aguardando {delay:.1f}s antes do próximo pin...')
+            time.sleep(delay)
+
+    def mark(self):
+        """Registra um pin publicado agora e agenda o próximo."""
+        self._next_at = time.monotonic() + self.min_interval + random.uniform(0, self.jitter)
+
+
+def action_pause():
+    """Pausa curta entre ações na página, apenas para não digitar/clicar instantaneamente."""
+    random_sleep(*PINTEREST_ACTION_PAUSE)
+
+
+def wait_for_optional(driver, condition, timeout=10):
+    """Espera uma condição da página sem falhar: devolve o resultado ou None se o tempo acabar."""
+    try:
+        return WebDriverWait(driver, timeout).until(condition)
+    except Exception:
+        return None
+
+
+def board_selected(theme):
+    """Condição: o botão do board mostra o tema escolhido."""
+    def condition(driver):
+        button = driver.find_element(By.XPATH, "//button[@data-test-id='board-dropdown-select-button']")
+        return theme.strip().lower() in button.text.strip().lower()
+    return condition
+
+
+def pinterest_resource(driver, resource, options, timeout=15, with_bookmark=False):
+    """
+    Consulta um resource interno do Pinterest pela sessão logada do navegador. Devolve `data` ou None.
+
+    Com with_bookmark=True devolve (data, bookmark da próxima página ou None).
+    """
+    url = (
+        f"https://www.pinterest.com/resource/{resource}/get/?source_url=/&data="
+        + quote(json.dumps({"options": options, "context": {}}))
+    )
+    driver.set_script_timeout(timeout)
+    response = driver.execute_async_script(
+        "var done = arguments[arguments.length - 1];"
+        "fetch(arguments[0], {credentials: 'include', headers: {'Accept': 'application/json', 'X-Requested-With': 'XMLHttpRequest'}})"
+        ".then(function (r) { return r.json(); }).then(done).catch(function () { done(null); });",
+        url
+    )
+    if not response:
+        return (None, None) if with_bookmark else None
+    resource_response = response.get('resource_response') or {}
+    if not with_bookmark:
+        return resource_response.get('data')
+    bookmark = resource_response.get('bookmark')
+    return resource_response.get('data'), (bookmark if bookmark and bookmark != '-end-' else None)
+
+
+def load_pinterest_boards(driver):
+    """
+    Lê uma vez a lista de boards da conta (todas as páginas): {nome normalizado: id}.
+
+    Devolve None se alguma página falhar: uma lista incompleta faria um board existente parecer ausente.
+    """
+    try:
+        settings = pinterest_resource(driver, 'UserSettingsResource', {})
+        username = settings.get('username') if settings else None
+        if not username:
+            print("Could not read the Pinterest username; board cache disabled.")
+            return None
+        board_ids = {}
+        bookmark = None
+        while True:
+            options = {
+                "username": username,
+                "page_size": 250,
+                "privacy_filter": "all",
+                "sort": "alphabetical",
+                "field_set_key": "profile_grid_item",
+            }
+            if bookmark:
+                options["bookmarks"] = [bookmark]
+            boards, bookmark = pinterest_resource(driver, 'BoardsResource', options, with_bookmark=True)
+            if boards is None:
+                print("Could not read the Pinterest board list; board cache disabled.")
+                return None
+            for board in boards:
+                if board.get('name'):
+                    board_ids[board['name'].strip().lower()] = board['id']
+            if not bookmark:
+                break
+        print(f"{len(board_ids)} Pinterest boards loaded.")
+        return board_ids
+    except Exception as e:
+        print("Error loading Pinterest boards:", e)
+        return None
+
+
+def build_pin_description(title, description, theme, keywords=None):
+    """Descrição do pin: descrição do post + chamada + hashtags (geradas se não vierem prontas)."""
+    if keywords is None:
+        keywords = generate_keywords(title, theme)
 
     # Atualizar a descrição com as palavras-chave
-    new_description = (
+    return (
         description + 
         " Save these ideas now and make your dream living room a reality! " + 
         keywords
     )
 
+
+def publish_on_pinterest(driver, wait, title, description, image_path, url, theme, keywords=None, boards=None):
+    """
+    Publishes a pin on Pinterest, selecting the board that matches the theme.
+
+    :param boards: Board cache from load_pinterest_boards (name -> id); skips the 30 s search timeout for missing boards
+    """
+    if not image_path or not os.path.exists(image_path):
+        print("No valid image path provided. Skipping Pinterest publishing.")
+        return
     
+    new_description = build_pin_description(title, description, theme, keywords)
+
     try:
         print('Preparing to publish on Pinterest...')
         
@@ -522,7 +2758,6 @@ def publish_on_pinterest(driver, wait, title, description, image_path, url, them
             ))     
             create_button.click()
             print('Create menu opened')
-            random_sleep(2, 4)
         except Exception as e:
             print("Error locating 'Create' button:", e)
             driver.save_screenshot("create_button_error.png")
@@ -533,7 +2768,7 @@ def publish_on_pinterest(driver, wait, title, description, image_path, url, them
             create_pin_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href='/pin-builder/']")))
             create_pin_button.click()
             print('Clicked Create Pin')
-            random_sleep(2, 4)
+            wait.until(EC.url_contains('/pin-builder'))
         except Exception as e:
             print("Error locating 'Create Pin' button:", e)
             driver.save_screenshot("create_pin_button_error.png")
@@ -544,8 +2779,13 @@ def publish_on_pinterest(driver, wait, title, description, image_path, url, them
             print('Uploading image...')
             image_upload_input = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='file']")))
             image_upload_input.send_keys(image_path)
-            print('Image uploaded')
-            random_sleep(2, 4)
+            # Espera a pré-visualização da imagem enviada aparecer no rascunho
+            if wait_for_optional(driver, EC.presence_of_element_located(
+                (By.XPATH, "//div[starts-with(@data-test-id, 'pin-draft')]//img")
+            )):
+                print('Image uploaded')
+            else:
+                print('Image uploaded (preview not detected)')
         except Exception as e:
             print("Error uploading image:", e)
             driver.save_screenshot("image_upload_error.png")
@@ -558,7 +2798,7 @@ def publish_on_pinterest(driver, wait, title, description, image_path, url, them
             title_input = wait.until(EC.visibility_of_element_located((By.XPATH, "//textarea[@placeholder='Add your title']")))
             title_input.send_keys(title)
             print('Title inserted')
-            random_sleep(1, 3)
+            action_pause()
 
             print('Inserting description...')
             description_input = wait.until(
@@ -569,7 +2809,7 @@ def publish_on_pinterest(driver, wait, title, description, image_path, url, them
             actions = ActionChains(driver)
             actions.move_to_element(description_input).click().send_keys(new_description).perform()
             print('Description inserted')
-            random_sleep(1, 3)
+            action_pause()
 
             print('Inserting link...')
             try:
@@ -579,16 +2819,18 @@ def publish_on_pinterest(driver, wait, title, description, image_path, url, them
                     )
                 )
                 driver.execute_script("arguments[0].scrollIntoView(true);", link_input)
-                random_sleep(0.5, 1)
                 actions = ActionChains(driver)
                 actions.move_to_element(link_input).click().send_keys(url).perform()
+                wait_for_optional(driver, EC.text_to_be_present_in_element_value(
+                    (By.XPATH, "//div[@data-test-id='pin-draft-link']//textarea"), url
+                ), timeout=5)
                 print('Link inserted')
             except Exception as e:
                 print("Error inserting link:", e)
                 driver.save_screenshot("insert_link_error.png")
                 return
 
-            random_sleep(1, 3)
+            action_pause()
 
         except Exception as e:
             print("Error inserting pin details:", e)
@@ -603,17 +2845,18 @@ def publish_on_pinterest(driver, wait, title, description, image_path, url, them
                 (By.XPATH, "//button[@data-test-id='board-dropdown-select-button']")
             ))
             board_dropdown_button.click()
-            random_sleep(1, 2)
 
             # Search for the board by theme name
             search_input = wait.until(EC.visibility_of_element_located(
                 (By.XPATH, "//input[contains(@placeholder, 'Search')]")
             ))
             search_input.send_keys(theme)
-            random_sleep(1, 2)
 
             # Normalize theme
             theme_normalized = theme.strip().lower()
+            # Com a lista de boards em cache, sabemos de antemão se o board existe
+            board_known = boards is not None and theme_normalized in boards
+            board_missing = boards is not None and not board_known
 
             # Wait for the board to appear in the list and select it
             board_xpath = (
@@ -622,35 +2865,52 @@ def publish_on_pinterest(driver, wait, title, description, image_path, url, them
             )
             from selenium.common.exceptions import (NoSuchElementException,
                                                     TimeoutException)
-            try:
-                board_option = wait.until(EC.element_to_be_clickable((By.XPATH, board_xpath)))
+            board_option = None
+            if board_missing:
+                print(f"Board '{theme}' not in the account's board list.")
+            else:
+                board_wait = WebDriverWait(driver, 10) if board_known else wait
+                try:
+                    board_option = board_wait.until(EC.element_to_be_clickable((By.XPATH, board_xpath)))
+                except (TimeoutException, NoSuchElementException) as e:
+                    print(f"Board '{theme}' not found. Error: {e}")
+
+            if board_option is not None:
                 board_option.click()
                 print(f"Board '{theme}' selected")
-            except (TimeoutException, NoSuchElementException) as e:
-                print(f"Board '{theme}' not found. Creating new board... Error: {e}")
+            else:
+                print(f"Creating new board '{theme}'...")
                 create_board_button = wait.until(EC.element_to_be_clickable(
                     (By.XPATH, "//div[@data-test-id='create-board']"))
                 )
                 create_board_button.click()
-                random_sleep(1, 2)
 
                 # Enter the board name in the creation modal
                 board_name_input = wait.until(EC.visibility_of_element_located(
                     (By.XPATH, "//input[@id='boardEditName']"))
                 )
-                board_name_input.clear()
-                # board_name_input.send_keys(theme)
-                random_sleep(1, 2)
+                # O Pinterest costuma preencher o nome com o texto da busca; digita o tema se não preencher
+                if board_name_input.get_attribute('value').strip().lower() != theme_normalized:
+                    board_name_input.clear()
+                    board_name_input.send_keys(theme)
+                action_pause()
 
                 # Save the new board
                 create_board_confirm_button = wait.until(EC.element_to_be_clickable(
                     (By.XPATH, "//button[@data-test-id='board-form-submit-button']"))
                 )
                 create_board_confirm_button.click()
-                print(f"Board '{theme}' created and selected")
-                random_sleep(2, 3)
+                # Espera o modal de criação fechar
+                wait.until(EC.invisibility_of_element_located((By.XPATH, "//input[@id='boardEditName']")))
+                if wait_for_optional(driver, board_selected(theme), timeout=5):
+                    print(f"Board '{theme}' created and selected")
+                    if boards is not None:
+                        boards[theme_normalized] = None  # id desconhecido até a próxima leitura da lista
+                else:
+                    print(f"Board created, but '{theme}' is not shown as selected; it will be looked up again next time.")
 
-            random_sleep(1, 2)
+            # Confirma que o board aparece como selecionado antes de publicar
+            wait_for_optional(driver, board_selected(theme), timeout=5)
 
         except Exception as e:
             print("Error selecting board:", e)
@@ -666,26 +2926,30 @@ def publish_on_pinterest(driver, wait, title, description, image_path, url, them
                 "//button[@data-test-id='board-dropdown-save-button' and .//div[text()='Publish']]"
             )))
             driver.execute_script("arguments[0].scrollIntoView(true);", publish_button)
-            time.sleep(random.uniform(1, 2))
+            action_pause()
             actions = ActionChains(driver)
             actions.move_to_element(publish_button).click().perform()
             print('Clicked Publish button')
             # driver.save_screenshot("after_publish_click.png")
-            random_sleep(7, 8)
 
             try:
-                print('Pin published successfully!')
+                # O modal de confirmação só aparece depois que o pin é salvo
                 modal_dismiss_button = wait.until(EC.element_to_be_clickable(
                     (By.XPATH, "//button[@aria-label='dismiss']")
                 ))
+                print('Pin published successfully!')
                 modal_dismiss_button.click()
+                wait_for_optional(driver, EC.invisibility_of_element_located(
+                    (By.XPATH, "//button[@aria-label='dismiss']")
+                ), timeout=5)
                 print('Confirmation modal closed.')
-                random_sleep(1, 2)
 
             except TimeoutException:
                 print('Pin published (could not find a specific success message).')
                 driver.save_screenshot("publish_no_success_message.png")
 
+            return True
+
         except Exception as e:
             print("Error publishing the pin:", e)
             driver.save_screenshot("publish_error.png")
@@ -696,18 +2960,300 @@ def publish_on_pinterest(driver, wait, title, description, image_path, url, them
         traceback.print_exc()
         driver.save_screenshot("unexpected_error_publish.png")
 
+# ========================
+# Pinterest Publishers
+# ========================
+
+class SeleniumPublisher:
+    """
+    Publica pins pelo navegador (publish_on_pinterest), com a lista de boards lida uma vez por driver.
+
+    Com `pool`, o driver só é obtido quando o primeiro post fica pronto (o login corre em paralelo
+    com a geração) e, se parar de responder, é trocado por outro do pool.
+    """
+
+    name = 'selenium'
+
+    def __init__(self, driver=None, wait=None, pool=None):
+        self.driver = driver
+        self.wait = wait
+        self.pool = pool
+        self._slot = None
+        self._boards = None
+        self._boards_loaded = False
+
+    def _driver_alive(self):
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def publish(self, result, theme):
+        """Publica o resultado de generate_post. Devolve True se o pin foi publicado."""
+        if self.driver is None:
+            self.driver, self.wait, self._slot = self.pool.acquire()
+            self._boards_loaded = False
+        try:
+            if not self._boards_loaded:
+                self._boards = load_pinterest_boards(self.driver)
+                self._boards_loaded = True
+            return publish_result_on_pinterest(self.driver, self.wait, result, theme, self._boards)
+        finally:
+            if self.pool is not None and not self._driver_alive():
+                print("WebDriver parou de responder; usando outro do pool.")
+                self.pool.replace(self.driver, self._slot)
+                self.driver = self.wait = None
+
+
+class PinterestAPIPublisher:
+    """Publica pins pela Pinterest API v5: board (em cache) + criação do pin, sem navegador."""
+
+    name = 'api'
+
+    def __init__(self, token=None, base_url=None):
+        self.token = token or PINTEREST_API_TOKEN
+        self.base_url = (base_url or PINTEREST_API_URL).rstrip('/')
+        self._boards = None
+
+    def _headers(self):
+        return {'Authorization': f'Bearer {self.token}', 'Content-Type': 'application/json'}
+
+    def load_boards(self):
+        """
+        Lê todos os boards da conta (paginados): {nome normalizado: id}.
+
+        Devolve None se alguma página falhar: uma lista incompleta faria um board existente parecer ausente.
+        """
+        boards = {}
+        bookmark = None
+        while True:
+            params = {'page_size': 250}
+            if bookmark:
+                params['bookmark'] = bookmark
+            response = http_get(f"{self.base_url}/boards", headers=self._headers(), params=params)
+            if response.status_code != 200:
+                print(f"Error listing Pinterest boards: {response.status_code} {response.text}")
+                return None
+            data = response.json()
+            for board in data.get('items', []):
+                boards[board['name'].strip().lower()] = board['id']
+            bookmark = data.get('bookmark')
+            if not bookmark:
+                break
+        return boards
+
+    def board_id(self, theme):
+        """Id do board do tema, criando-o se não existir (só depois de uma listagem completa)."""
+        if self._boards is None:
+            # Sem listagem completa não cria board; a listagem é refeita no próximo pin
+            self._boards = self.load_boards()
+            if self._boards is None:
+                return None
+        theme_normalized = theme.strip().lower()
+        if theme_normalized in self._boards:
+            return self._boards[theme_normalized]
+
+        response = http_post(f"{self.base_url}/boards", headers=self._headers(), json={'name': theme})
+        if response.status_code not in (200, 201):
+            print(f"Error creating board '{theme}': {response.status_code} {response.text}")
+            return None
+        print(f"Board '{theme}' created")
+        self._boards[theme_normalized] = response.json()['id']
+        return self._boards[theme_normalized]
+
+    def media_source(self, image_path):
+        """
+        Imagem do pin: URL pública (MEDIA_BASE_URL) ou JPEG em base64 (a API não aceita WebP).
+
+        A v5 só tem upload separado (POST /media) para vídeos; imagens vão no próprio POST /pins.
+        """
+        if MEDIA_BASE_URL:
+            return {
+                'source_type': 'image_url',
+                'url': f"{MEDIA_BASE_URL.rstrip('/')}/media/featured_images/{os.path.basename(image_path)}",
+            }
+        image = Image.open(image_path)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=90)
+        return {
+            'source_type': 'image_base64',
+            'content_type': 'image/jpeg',
+            'data': base64.b64encode(buffer.getvalue()).decode('ascii'),
+        }
+
+    def publish(self, result, theme):
+        """Publica o resultado de generate_post. Devolve True se o pin foi criado."""
+        image_path = result['featured_image_path']
+        if not image_path or not os.path.exists(image_path):
+            print("No valid image path provided. Skipping Pinterest publishing.")
+            return None
+        board_id = self.board_id(theme)
+        if not board_id:
+            return None
+
+        payload = {
+            'board_id': board_id,
+            'title': verify_and_truncate_title(result['title']),
+            'description': build_pin_description(
+                result['title'], result['main_description'], theme, result.get('keywords')
+            )[:500],
+            'link': result['post_url'],
+            'media_source': self.media_source(image_path),
+        }
+        response = http_post(f"{self.base_url}/pins", headers=self._headers(), json=payload)
+        if response.status_code in (200, 201):
+            print(f"Pin published successfully! id={response.json().get('id')}")
+            return True
+        print(f"Error publishing the pin: {response.status_code} {response.text}")
+        return None
+
+# ========================
+# Job Journal
+# ========================
+
+# Etapas de um post, na ordem; 'failed' encerra o post sem retomada
+JOB_STAGES = ('created', 'title', 'ideas', 'content', 'django', 'pinned')
+
+
+class JobJournal:
+    """Diário em SQLite com o estado de cada post, gravado ao final de cada etapa."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, theme TEXT, stage TEXT, data TEXT, "
+            "created_at REAL, updated_at REAL)"
+        )
+        self._db.commit()
+
+    def create(self, theme):
+        with self._lock:
+            now = time.time()
+            cursor = self._db.execute(
+                "INSERT INTO jobs (theme, stage, data, created_at, updated_at) VALUES (?, 'created', '{}', ?, ?)",
+                (theme, now, now)
+            )
+            self._db.commit()
+            return cursor.lastrowid
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute("SELECT id, theme, stage, data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {'id': row[0], 'theme': row[1], 'stage': row[2], 'data': json.loads(row[3])}
+
+    def update(self, job_id, stage, **fields):
+        """Avança o post para `stage`, mesclando `fields` aos dados já gravados."""
+        with self._lock:
+            row = self._db.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            data = json.loads(row[0]) if row else {}
+            data.update(fields)
+            self._db.execute(
+                "UPDATE jobs SET stage = ?, data = ?, updated_at = ? WHERE id = ?",
+                (stage, json.dumps(data), time.time(), job_id)
+            )
+            self._db.commit()
+
+    def unfinished(self):
+        """Posts interrompidos (nem publicados no Pinterest nem com falha), do mais antigo ao mais novo."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, theme, stage FROM jobs WHERE stage NOT IN ('pinned', 'failed') ORDER BY id"
+            ).fetchall()
+        return [{'id': row[0], 'theme': row[1], 'stage': row[2]} for row in rows]
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """Devolve o diário compartilhado (None se JOURNAL=0)."""
+    global _journal
+    if not JOURNAL:
+        return None
+    with _journal_lock:
+        if _journal is None:
+            _journal = JobJournal(JOURNAL_PATH)
+        return _journal
+
+
+def load_job(job_id):
+    """Dados gravados do post (dicionário vazio sem diário)."""
+    journal = get_journal()
+    job = journal.get(job_id) if journal and job_id else None
+    return job['data'] if job else {}
+
+
+def record_stage(job_id, stage, **fields):
+    """Grava a conclusão de uma etapa do post no diário, se ativo."""
+    if stage not in JOB_STAGES and stage != 'failed':
+        raise ValueError(f"Etapa desconhecida: {stage}")
+    journal = get_journal()
+    if journal and job_id:
+        journal.update(job_id, stage, **fields)
+
 # ========================
 # Function to Publish Both
 # ========================
 
-def publish_and_generate_blog(title, theme, driver, wait):
-    ideas_with_descriptions = generate_related_ideas(title)
-    if not ideas_with_descriptions:
-        print("Nenhuma ideia foi gerada.")
-        return None  # Retorna None se não houver ideias
+def journal_streamed_ideas(job_id, ideas, known):
+    """Repassa o fluxo de ideias gravando cada ideia nova no diário assim que chega (campo partial_ideas)."""
+    received = {str(i): idea_data for i, idea_data in known.items()}
+    for i, idea_data in ideas:
+        if str(i) not in received:
+            received[str(i)] = idea_data
+            # O post continua na etapa 'title' até todas as ideias chegarem
+            record_stage(job_id, 'title', partial_ideas=received)
+        yield i, idea_data
+
+
+def django_retryable(status):
+    """Indica se a falha do Django pode ser retomada: sem resposta, 5xx, 408/429 ou tema em cache desatualizado (404/409)."""
+    return status is None or status >= 500 or status in (404, 408, 409, 429)
+
+
+def publish_and_generate_blog(title, theme, driver, wait, post=None, job_id=None):
+    """
+    Gera ideias, imagens e publica no Django. `post` traz o resultado de generate_post_one_shot, se houver.
+
+    Com `job_id`, cada etapa concluída é gravada no diário e as já concluídas não são refeitas.
+    Com STREAM_IDEAS, as ideias geradas aqui seguem para as imagens uma a uma, sem esperar as demais.
+    """
+    job_data = load_job(job_id)
+    if job_data.get('result'):
+        return job_data['result']
+
+    streaming = False
+    if job_data.get('ideas'):
+        ideas_with_descriptions = job_data['ideas']
+    elif post:
+        ideas_with_descriptions = post['ideas']
+    elif STREAM_IDEAS:
+        # Gerador: as ideias só começam a ser geradas quando generate_blog_content as consome.
+        # Ideias recebidas numa execução interrompida não são pedidas de novo
+        known = {int(i): idea_data for i, idea_data in job_data.get('partial_ideas', {}).items()}
+        ideas_with_descriptions = journal_streamed_ideas(job_id, iter_related_ideas(title, known=known), known)
+        streaming = True
+    else:
+        ideas_with_descriptions = generate_related_ideas(title)
+    if not streaming:
+        if not ideas_with_descriptions:
+            print("Nenhuma ideia foi gerada.")
+            record_stage(job_id, 'failed')
+            return None  # Retorna None se não houver ideias
+        record_stage(job_id, 'ideas', ideas=ideas_with_descriptions)
 
     # Token de autenticação seguro
-    token = '1fbca8225f25f61a50abf42fb7a14518b25587ac'
+    token = DJANGO_API_TOKEN
     if not token:
         print("Token de autenticação não encontrado. Defina a variável de ambiente 'DJANGO_API_TOKEN'.")
         return None
@@ -716,26 +3262,45 @@ def publish_and_generate_blog(title, theme, driver, wait):
     theme_slug = slugify(theme)
     ensure_theme_exists(theme, token)
 
-    # Gerar o conteúdo do blog e a imagem destacada
-    content_data, featured_image_local_path, featured_image_remote_path = generate_blog_content(title, ideas_with_descriptions, theme)
+    # Gerar o conteúdo do blog e a imagem destacada (imagens já enviadas ao servidor)
+    if job_data.get('content'):
+        print(f"Retomando post '{title}' após o envio das imagens.")
+        content_data = job_data['content']
+        featured_image_local_path = job_data['featured_image_local_path']
+        featured_image_remote_path = job_data['featured_image_remote_path']
+        featured_image_data = None
+    else:
+        content_data, featured_image_local_path, featured_image_remote_path = generate_blog_content(
+            title, ideas_with_descriptions, theme,
+            main_description=post['main_description'] if post else None
+        )
+        featured_image_data = content_data.pop('featured_image_data', None)
+        source_ideas = content_data.pop('source_ideas')
+        if streaming:
+            if not source_ideas:
+                print("Nenhuma ideia foi gerada.")
+                record_stage(job_id, 'failed')
+                return None
+            record_stage(job_id, 'ideas', ideas=source_ideas)
     # print("Conteúdo gerado:", content_data)
 
     if not featured_image_local_path:
         print("Image generation failed. Skipping Pinterest publishing.")
-        return {
-            "title": title,
-            "main_description": main_description,
-            "featured_image_path": None,
-            "post_url": post_url
-        }
+        record_stage(job_id, 'failed')
+        return None
+    record_stage(
+        job_id, 'content',
+        content=content_data,
+        featured_image_local_path=featured_image_local_path,
+        featured_image_remote_path=featured_image_remote_path
+    )
 
     # Extrair as informações do dicionário content_data
     main_description = content_data['main_description']
     meta_description = content_data['meta_description']
     ideas = content_data['ideas']
 
-    # Chamar publish_to_django com os argumentos corretos
-    post_response = publish_to_django(
+    post_fields = dict(
         title=title,
         content=main_description,  # Conteúdo principal do post
         main_description=main_description,
@@ -743,13 +3308,21 @@ def publish_and_generate_blog(title, theme, driver, wait):
         ideas=ideas,
         featured_image_path=featured_image_local_path,  # Use o caminho local aqui
         theme_slug=theme_slug,  # Passar o slug do tema
-        token_autenticacao=token
+        featured_image_data=featured_image_data
     )
+    with trace_span('django') as span:
+        if DJANGO_BATCH_SIZE > 1:
+            # Aguarda o lote com os posts das outras threads ser enviado
+            django_status, response_data = get_django_batcher(token).publish(**post_fields)
+        else:
+            # Chamar publish_to_django com os argumentos corretos
+            post_response = publish_to_django(token_autenticacao=token, **post_fields)
+            django_status = post_response.status_code if post_response is not None else None
+            response_data = post_response.json() if django_status == 201 else {}
+        span['ok'] = django_status == 201
 
     post_url = None  # Inicializa post_url como None
-    if post_response and post_response.status_code == 201:
-        response_data = post_response.json()
-
+    if django_status == 201:
         post_url = response_data.get("link")
         post_id = response_data.get("id")
 
@@ -760,16 +3333,29 @@ def publish_and_generate_blog(title, theme, driver, wait):
         else:
             print("A URL ou ID da postagem não foram encontrados na resposta da API.")
     else:
+        if django_status in (404, 409):
+            # O tema em cache pode ter sido removido ou alterado no Django
+            invalidate_theme(theme_slug)
         print("Não foi possível publicar no Django ou obter o ID da imagem destacada.")
+        django_attempts = job_data.get('django_attempts', 0) + 1
+        if django_retryable(django_status) and django_attempts < DJANGO_MAX_ATTEMPTS:
+            # O diário fica na etapa 'content': a próxima execução refaz apenas a publicação
+            print(f"O post será publicado novamente na próxima execução (tentativa {django_attempts} de {DJANGO_MAX_ATTEMPTS}).")
+            record_stage(job_id, 'content', django_attempts=django_attempts)
+        else:
+            record_stage(job_id, 'failed', django_status=django_status, django_attempts=django_attempts)
         return None  # Retorna None se a publicação falhar
 
     # Retorna os dados necessários para publicar no Pinterest
-    return {
+    result = {
         "title": title,
         "main_description": main_description,
         "featured_image_path": featured_image_local_path,  # Use o caminho local aqui
-        "post_url": post_url
+        "post_url": post_url,
+        "keywords": post['keywords'] if post else None
     }
+    record_stage(job_id, 'django', post_id=post_id, post_url=post_url, result=result)
+    return result
 
 
 
@@ -778,22 +3364,127 @@ def publish_and_generate_blog(title, theme, driver, wait):
 # Helper Functions
 # ========================
 
+def slugify(value):
+    """
+    Equivalente a django.utils.text.slugify (allow_unicode=False), sem carregar o Django.
+
+    Remove acentos, descarta o que não for letra, número, espaço ou hífen e junta as palavras com hífens.
+    """
+    value = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode('ascii')
+    value = re.sub(r'[^\w\s-]', '', value.lower())
+    return re.sub(r'[-\s]+', '-', value).strip('-_')
+
+
 def random_sleep(min_seconds=2, max_seconds=5):
     """Faz uma pausa aleatória entre min_seconds e max_seconds para simular comportamento humano."""
     sleep_time = random.uniform(min_seconds, max_seconds)
     # print(f'Aguardando {sleep_time:.2f} segundos...')
     time.sleep(sleep_time)
 
-def ensure_theme_exists(theme_name, token_autenticacao):
-    url = 'https://www.dailydecorideas.com/api/themes/'
+_theme_cache = {}  # slug -> timestamp da última confirmação
+_theme_cache_lock = threading.Lock()
+_theme_cache_loaded = False
+_theme_locks = {}  # slug -> lock da verificação/criação do tema
+
+
+def _load_theme_cache():
+    """Carrega o cache persistido (uma vez por processo). Deve ser chamado com o lock adquirido."""
+    global _theme_cache_loaded
+    if _theme_cache_loaded:
+        return
+    _theme_cache_loaded = True
+    if THEME_CACHE_FILE and os.path.exists(THEME_CACHE_FILE):
+        try:
+            with open(THEME_CACHE_FILE) as f:
+                _theme_cache.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Erro ao ler cache de temas: {e}")
+
+
+def _save_theme_cache():
+    if not THEME_CACHE_FILE:
+        return
+    try:
+        with open(THEME_CACHE_FILE, 'w') as f:
+            json.dump(_theme_cache, f)
+    except OSError as e:
+        print(f"Erro ao gravar cache de temas: {e}")
+
+
+def theme_cached(theme_slug):
+    """Indica se o tema foi confirmado no Django dentro do TTL."""
+    with _theme_cache_lock:
+        _load_theme_cache()
+        checked_at = _theme_cache.get(theme_slug)
+        return checked_at is not None and time.time() - checked_at < THEME_CACHE_TTL
+
+
+def remember_theme(theme_slug):
+    with _theme_cache_lock:
+        _load_theme_cache()
+        _theme_cache[theme_slug] = time.time()
+        _save_theme_cache()
+
+
+def invalidate_theme(theme_slug):
+    """Remove o tema do cache (ex.: a API respondeu 404/409 para ele)."""
+    with _theme_cache_lock:
+        _load_theme_cache()
+        if _theme_cache.pop(theme_slug, None) is not None:
+            print(f"Cache do tema '{theme_slug}' invalidado.")
+            _save_theme_cache()
+
+
+def prewarm_theme_cache(theme_names, token_autenticacao):
+    """Preenche o cache com uma única listagem de /api/themes/ (útil com vários temas)."""
+    url = f'{DJANGO_API_URL}/themes/'
     headers = {
         'Authorization': f'Token {token_autenticacao}' if token_autenticacao else '',
     }
+    wanted = {slugify(theme_name) for theme_name in theme_names}
+    if all(theme_cached(theme_slug) for theme_slug in wanted):
+        return
 
+    response = http_get(url, headers=headers)
+    if response.status_code != 200:
+        print(f"Erro ao listar temas: {response.status_code}")
+        return
+    themes = response.json()
+    # Aceita lista simples ou resposta paginada do DRF
+    if isinstance(themes, dict):
+        themes = themes.get('results', [])
+    for theme in themes:
+        if theme.get('slug') in wanted:
+            remember_theme(theme['slug'])
+
+
+def theme_lock(theme_slug):
+    """Lock por tema: posts simultâneos do mesmo tema fazem uma única verificação/criação no Django."""
+    with _theme_cache_lock:
+        return _theme_locks.setdefault(theme_slug, threading.Lock())
+
+
+def ensure_theme_exists(theme_name, token_autenticacao):
     theme_slug = slugify(theme_name)
 
+    if theme_cached(theme_slug):
+        return theme_slug
+
+    # As demais threads esperam a primeira e encontram o tema já no cache
+    with theme_lock(theme_slug):
+        if theme_cached(theme_slug):
+            return theme_slug
+        return _ensure_theme_exists(theme_name, theme_slug, token_autenticacao)
+
+
+def _ensure_theme_exists(theme_name, theme_slug, token_autenticacao):
+    url = f'{DJANGO_API_URL}/themes/'
+    headers = {
+        'Authorization': f'Token {token_autenticacao}' if token_autenticacao else '',
+    }
+
     # Verificar se o tema já existe
-    response = requests.get(f"{url}?slug={theme_slug}", headers=headers)
+    response = http_get(f"{url}?slug={theme_slug}", headers=headers)
     # print(f"GET {response.url} -> {response.status_code}")
     if response.status_code == 200:
         themes = response.json()
@@ -803,6 +3494,7 @@ def ensure_theme_exists(theme_name, token_autenticacao):
             for theme in themes:
                 if theme['slug'] == theme_slug:
                     print(f"Tema '{theme_name}' já existe.")
+                    remember_theme(theme_slug)
                     return theme_slug
             print(f"Tema '{theme_name}' não encontrado na resposta.")
         else:
@@ -814,13 +3506,15 @@ def ensure_theme_exists(theme_name, token_autenticacao):
     data = {
         'name': theme_name,
     }
-    response = requests.post(url, headers=headers, json=data)
+    response = http_post(url, headers=headers, json=data)
     # print(f"POST {url} -> {response.status_code}")
     if response.status_code == 201:
         print(f"Tema '{theme_name}' criado com sucesso.")
+        remember_theme(theme_slug)
         return theme_slug
     else:
         print(f"Erro ao criar tema: {response.status_code}")
+        invalidate_theme(theme_slug)
         return None
 
 
@@ -828,52 +3522,216 @@ def ensure_theme_exists(theme_name, token_autenticacao):
 # Main Function
 # ========================
 
-def main(theme, x):
-    """Main function that executes the process of generation and publishing."""
-    driver, wait = initialize_webdriver()
-    try:
-        login_pinterest(driver, wait, pinterest_email, pinterest_password)
-        
-        for i in range(x):
-            print(f"Execution {i+1} of {x}")
-            blog_title = generate_blog_title(theme)
-            if blog_title:
-                result = publish_and_generate_blog(blog_title, theme, driver, wait)
-                if result:
-                    # Call publish_on_pinterest with the correct parameters
-                    publish_on_pinterest(
-                        driver=driver,
-                        wait=wait,
-                        title=result['title'],
-                        description=result['main_description'],
-                        image_path=result['featured_image_path'],
-                        url=result['post_url'],
-                        theme=theme  # Pass the theme here
-                    )
+def generate_post(theme, job_id=None):
+    """Executa as etapas de texto, imagens e Django de um post. Devolve o resultado para o Pinterest ou None."""
+    job_data = load_job(job_id)
+    if job_data.get('title'):
+        blog_title, post = job_data['title'], job_data.get('post')
+    else:
+        post = generate_post_one_shot(theme) if ONE_SHOT_MODE else None
+        blog_title = post['title'] if post else (None if ONE_SHOT_MODE else generate_blog_title(theme))
+        if not blog_title:
+            print("Could not generate a title for the provided theme.")
+            record_stage(job_id, 'failed')
+            return None
+        record_stage(job_id, 'title', title=blog_title, post=post)
+
+    result = publish_and_generate_blog(blog_title, theme, None, None, post=post, job_id=job_id)
+    if not result:
+        print("Failed to publish and generate blog.")
+    return result
+
+
+def publish_result_on_pinterest(driver, wait, result, theme, boards=None):
+    """Publica no Pinterest o resultado de generate_post. Devolve True se o pin foi publicado."""
+    return publish_on_pinterest(
+        driver=driver,
+        wait=wait,
+        title=result['title'],
+        description=result['main_description'],
+        image_path=result['featured_image_path'],
+        url=result['post_url'],
+        theme=theme,  # Pass the theme here
+        keywords=result.get('keywords'),
+        boards=boards
+    )
 
-                    # Small pause between executions to avoid detection
-                    random_sleep(4, 5)
-                else:
-                    print("Failed to publish and generate blog.")
-            else:
-                print("Could not generate a title for the provided theme.")
+
+def run_posts(themes, publisher, concurrency=None):
+    """
+    Gera vários posts ao mesmo tempo e publica-os no Pinterest à medida que ficam prontos.
+
+    :param themes: Lista com o tema de cada post
+    :param publisher: Backend de publicação (SeleniumPublisher ou PinterestAPIPublisher)
+    :param concurrency: Posts em andamento ao mesmo tempo (padrão: POST_CONCURRENCY)
+
+    Os posts passam por GPT, imagens e Django em threads; os concluídos entram numa fila
+    que a thread atual (dona do WebDriver) esvazia, um pin por vez. Os posts prontos de um
+    mesmo tema são publicados em sequência, para que o Pinterest permaneça no mesmo board;
+    quando o tema atual não tem posts prontos, passa para o tema com mais posts prontos.
+    """
+    concurrency = POST_CONCURRENCY if concurrency is None else concurrency
+    pinterest_queue = queue.Queue()
+    journal = get_journal()
+
+    # Posts interrompidos numa execução anterior são retomados primeiro e contam na quantidade pedida
+    jobs = []
+    remaining = list(themes)
+    if journal:
+        for job in journal.unfinished():
+            if job['theme'] in remaining:
+                remaining.remove(job['theme'])
+                print(f"Retomando post {job['id']} ({job['theme']}) a partir da etapa '{job['stage']}'.")
+                jobs.append((job['theme'], job['id']))
+    for theme in remaining:
+        jobs.append((theme, journal.create(theme) if journal else None))
+    themes = [theme for theme, _ in jobs]
+    total = len(jobs)
+
+    def worker(n, theme, job_id):
+        print(f"Execution {n} of {total}")
+        # Identificador do post nas etapas rastreadas (o id do diário, quando houver)
+        trace_id = job_id if job_id is not None else new_trace_id()
+        try:
+            with trace_span('post', post=trace_id) as span:
+                result = generate_post(theme, job_id)
+                span['ok'] = result is not None
+        except Exception as e:
+            print(f"Error generating post {n}:", e)
+            traceback.print_exc()
+            result = None
+        pinterest_queue.put((n, theme, (job_id, trace_id, result)))
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        for n, (theme, job_id) in enumerate(jobs, 1):
+            executor.submit(worker, n, theme, job_id)
+
+        pacer = PinPacer()
+        ready = {}  # tema -> posts prontos para o Pinterest
+        current_theme = None
+        received = 0
+
+        def receive(item):
+            n, theme, (job_id, trace_id, result) = item
+            if result:
+                ready.setdefault(theme, []).append((job_id, trace_id, result))
+
+        while received < total or any(ready.values()):
+            # Recolhe sem esperar os posts já concluídos, para a escolha do tema considerar todos os prontos
+            while received < total:
+                try:
+                    receive(pinterest_queue.get_nowait())
+                except queue.Empty:
+                    break
+                received += 1
+
+            # Fica no tema atual enquanto ele tiver posts prontos; senão, vai para o tema com mais posts prontos
+            if not ready.get(current_theme):
+                candidates = [theme for theme, results in ready.items() if results]
+                current_theme = max(candidates, key=lambda theme: len(ready[theme])) if candidates else None
+
+            if current_theme is not None and ready.get(current_theme):
+                job_id, trace_id, result = ready[current_theme].pop(0)
+                # Intervalo mínimo entre pins para evitar detecção
+                pacer.wait_turn()
+                with trace_span('pinterest', post=trace_id) as span:
+                    try:
+                        span['ok'] = bool(publisher.publish(result, current_theme))
+                    except Exception as e:
+                        # Um erro de rede não interrompe os demais pins; o post fica no diário para a próxima execução
+                        print(f"Error publishing post {job_id} on Pinterest:", e)
+                        traceback.print_exc()
+                        span['ok'] = False
+                if span['ok']:
+                    record_stage(job_id, 'pinned')
+                pacer.mark()
                 continue
 
+            if received < total:
+                receive(pinterest_queue.get())
+                received += 1
+
+
+def interleave_themes(manifest):
+    """Distribui os posts entre os temas de forma alternada: [(tema, quantidade), ...] -> lista de temas."""
+    remaining = [[theme, count] for theme, count in manifest]
+    themes = []
+    while any(count > 0 for _, count in remaining):
+        for entry in remaining:
+            if entry[1] > 0:
+                themes.append(entry[0])
+                entry[1] -= 1
+    return themes
+
+
+def load_manifest(manifest_path):
+    """
+    Lê o manifesto de temas em JSON: [{"theme": "christmas decor ideas", "count": 6}, ...]
+    ou {"christmas decor ideas": 6, ...}. Devolve [(tema, quantidade), ...].
+    """
+    with open(manifest_path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return [(theme, int(count)) for theme, count in data.items()]
+    return [(entry['theme'], int(entry['count'])) for entry in data]
+
+
+def run_session(themes, backend=None):
+    """
+    Executa os posts com o backend de publicação escolhido (PINTEREST_BACKEND), liberando os recursos compartilhados no final.
+
+    Com 'selenium', usa um WebDriver logado do pool; com 'api', não abre navegador.
+    """
+    backend = backend or PINTEREST_BACKEND
+    # O pool abre o Chrome e faz login em segundo plano enquanto os primeiros posts são gerados
+    driver_pool = WebDriverPool() if backend == 'selenium' else None
+    try:
+        if driver_pool is not None:
+            # O driver só é pedido ao pool quando o primeiro post fica pronto para o Pinterest
+            publisher = SeleniumPublisher(pool=driver_pool)
+        elif backend == 'api':
+            publisher = PinterestAPIPublisher()
+        else:
+            raise ValueError(f"Backend de publicação desconhecido: {backend}")
+
+        run_posts(themes, publisher)
+
     except Exception as e:
         print("General script error:", e)
         traceback.print_exc()
     finally:
-        driver.quit()
-        print("WebDriver closed.")
+        if driver_pool is not None:
+            driver_pool.close()
+        close_django_batcher()
+        close_sftp_pools()
+        print_http_stats()
+        print_trace_summary()
+
+
+def main(theme, x):
+    """Main function that executes the process of generation and publishing."""
+    run_session([theme] * x)
+
+
+def run_batch(manifest_path):
+    """Executa vários temas numa única sessão, a partir de um manifesto (ver load_manifest)."""
+    manifest = load_manifest(manifest_path)
+    print(f"Batch: {', '.join(f'{theme} ({count})' for theme, count in manifest)}")
+    prewarm_theme_cache([theme for theme, _ in manifest], DJANGO_API_TOKEN)
+    run_session(interleave_themes(manifest))
 
 # ========================
 # Script Exec
 # ========================
 
 if __name__ == "__main__":
-    # theme_slugs = [christmas-decor-ideas', 'living-room-decor-ideas', 'interior-design-ideas', 'bathroom-decor-ideas']
-    # change number of ideas in generate_blog_title()
-    x = 24  # number of executions
-    theme = "christmas decor ideas"
+    if len(sys.argv) > 1:
+        # python script.py themes.json
+        run_batch(sys.argv[1])
+    else:
+        # theme_slugs = [christmas-decor-ideas', 'living-room-decor-ideas', 'interior-design-ideas', 'bathroom-decor-ideas']
+        # change number of ideas in generate_blog_title()
+        x = 24  # number of executions
+        theme = "christmas decor ideas"
 
-    main(theme, x)
\ No newline at end of file
+        main(theme, x)
@@ -0,0 +1,583 @@
+"""
+Servidores locais que imitam as APIs externas usadas por script.py, para testes sem custo.
+
+Uso:
+    python stub_servers.py pinterest --port 8765
+    PINTEREST_BACKEND=api PINTEREST_API_URL=http://127.0.0.1:8765/v5 PINTEREST_API_TOKEN=test python script.py
+
+    python stub_servers.py django --port 8766
+    DJANGO_API_URL=http://127.0.0.1:8766/api DJANGO_BATCH_SIZE=3 python script.py
+
+    python stub_servers.py openai --port 8767 --latency 0.3
+    python stub_servers.py getimg --port 8768 --latency 1.5
+    python stub_servers.py sftp --port 2222
+
+Para rodar um post completo contra todos os stubs de uma vez, use benchmark.py.
+"""
+import argparse
+import io
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import socket
+import tempfile
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import paramiko
+from PIL import Image
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Encaminha cada requisição para StubServer.handle e devolve a resposta em JSON."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self, method):
+        parsed = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        stub = self.server.stub
+        if stub.latency:
+            time.sleep(stub.latency)
+        with stub.lock:
+            stub.requests.append((method, parsed.path))
+        status, data = stub.handle(method, parsed.path, parse_qs(parsed.query), body, self.headers)
+        if isinstance(data, bytes):
+            payload, content_type = data, 'application/octet-stream'
+        else:
+            payload, content_type = json.dumps(data).encode('utf-8'), 'application/json'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+
+def parse_multipart(body, content_type):
+    """Separa um corpo multipart/form-data em ({campo: texto}, {campo: (nome do arquivo, bytes)})."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + body
+    )
+    fields, files = {}, {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        filename = part.get_filename()
+        payload = part.get_payload(decode=True) or b''
+        if filename is not None:
+            files[name] = (filename, payload)
+        else:
+            fields[name] = payload.decode('utf-8')
+    return fields, files
+
+
+class StubServer:
+    """Base dos stubs: servidor HTTP em thread própria, com latência configurável e registro das requisições."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = []
+        self._server = ThreadingHTTPServer((host, port), StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, method, path, query, body, headers):
+        """Devolve (status, dados JSON ou bytes). Implementado por cada stub."""
+        return 404, {'error': 'not found'}
+
+
+class PinterestAPIStub(StubServer):
+    """Imita os endpoints da Pinterest API v5 usados por PinterestAPIPublisher (/v5/boards e /v5/pins)."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, boards=()):
+        super().__init__(host, port, latency)
+        self._ids = itertools.count(1)
+        self.boards = {}
+        self.pins = []
+        for name in boards:
+            self._create_board(name)
+
+    def _create_board(self, name):
+        board = {'id': str(next(self._ids)), 'name': name}
+        self.boards[board['id']] = board
+        return board
+
+    def handle(self, method, path, query, body, headers):
+        if not headers.get('Authorization', '').startswith('Bearer '):
+            return 401, {'code': 2, 'message': 'Authentication failed.'}
+        data = json.loads(body or b'{}')
+        with self.lock:
+            if path == '/v5/boards' and method == 'GET':
+                return 200, {'items': list(self.boards.values()), 'bookmark': None}
+            if path == '/v5/boards' and method == 'POST':
+                if not data.get('name'):
+                    return 400, {'code': 1, 'message': 'name is required'}
+                return 201, self._create_board(data['name'])
+            if path == '/v5/pins' and method == 'POST':
+                if data.get('board_id') not in self.boards:
+                    return 404, {'code': 40, 'message': 'Board not found.'}
+                if not data.get('media_source'):
+                    return 400, {'code': 1, 'message': 'media_source is required'}
+                pin = dict(data, id=str(next(self._ids)))
+                self.pins.append(pin)
+                return 201, {key: value for key, value in pin.items() if key != 'media_source'}
+        return 404, {'code': 404, 'message': 'Not found'}
+
+
+class DjangoAPIStub(StubServer):
+    """
+    Imita a API do blog em Django: /api/themes/, /api/api_posts/ e o envio em lote /api/api_posts/batch/.
+
+    Posts com título acima de 100 caracteres, sem imagem destacada ou com tema inexistente são
+    recusados item a item, como faria a validação do serializer. Com batch=False o endpoint de
+    lote responde 404, como num servidor que ainda não o tem.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, themes=(), batch=True):
+        super().__init__(host, port, latency)
+        self._ids = itertools.count(1)
+        self.batch = batch
+        self.themes = {}
+        self.posts = []
+        self.batches = []
+        for name in themes:
+            self._create_theme(name)
+
+    def _create_theme(self, name):
+        slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+        theme = {'id': next(self._ids), 'name': name, 'slug': slug}
+        self.themes[slug] = theme
+        return theme
+
+    def _create_post(self, fields, image):
+        errors = {}
+        if not fields.get('title') or len(fields['title']) > 100:
+            errors['title'] = ['Certifique-se de que este campo não tenha mais de 100 caracteres.']
+        if image is None:
+            errors['featured_image'] = ['Nenhum arquivo foi submetido.']
+        missing = [slug for slug in fields.get('themes', []) if slug not in self.themes]
+        if missing:
+            errors['themes'] = [f'Tema inexistente: {slug}' for slug in missing]
+        if errors:
+            return 400, errors
+        post_id = next(self._ids)
+        slug = re.sub(r'[^a-z0-9]+', '-', fields['title'].lower()).strip('-')[:50]
+        post = dict(fields, id=post_id, featured_image=image[0], image_bytes=len(image[1]))
+        self.posts.append(post)
+        return 201, {'id': post_id, 'link': f"{self.url}/{slug}/"}
+
+    def handle(self, method, path, query, body, headers):
+        if not headers.get('Authorization', '').startswith('Token '):
+            return 401, {'detail': 'As credenciais de autenticação não foram fornecidas.'}
+        with self.lock:
+            if path == '/api/themes/' and method == 'GET':
+                slug = query.get('slug', [None])[0]
+                return 200, [theme for theme in self.themes.values() if slug in (None, theme['slug'])]
+            if path == '/api/themes/' and method == 'POST':
+                name = json.loads(body or b'{}').get('name')
+                if not name:
+                    return 400, {'name': ['Este campo é obrigatório.']}
+                return 201, self._create_theme(name)
+            if path == '/api/api_posts/' and method == 'POST':
+                fields, files = parse_multipart(body, headers['Content-Type'])
+                fields['ideas'] = json.loads(fields.get('ideas') or '[]')
+                fields['themes'] = [fields['themes']] if fields.get('themes') else []
+                return self._create_post(fields, files.get('featured_image'))
+            if path == '/api/api_posts/batch/' and method == 'POST' and self.batch:
+                fields, files = parse_multipart(body, headers['Content-Type'])
+                items = json.loads(fields['manifest'])['posts']
+                self.batches.append(len(items))
+                results = []
+                for item in items:
+                    status, data = self._create_post(item, files.get(item.get('featured_image')))
+                    results.append(dict(data if status == 201 else {'errors': data}, ref=item.get('ref'), status=status))
+                return 207, {'results': results}
+        return 404, {'detail': 'Não encontrado.'}
+
+
+LOREM = (
+    "soft warm light layered textures natural wood linen throw pillows brass accents evergreen garland "
+    "candles woven baskets vintage ornaments cozy corner reading nook neutral palette velvet ribbon"
+).split()
+
+
+class OpenAIStub(StubServer):
+    """
+    Imita /v1/chat/completions da OpenAI (formato usado pelo openai 0.28), com `usage` na resposta.
+
+    A resposta segue o pedido reconhecido no prompt (título, ideia, palavras-chave, descrição ou
+    documento JSON do modo de chamada única). Com `malformed_rate`, essa fração das respostas vem
+    fora das regras (ideia sem descrição, título longo, JSON truncado), para exercitar as novas tentativas.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, malformed_rate=0.0, seed=None):
+        super().__init__(host, port, latency)
+        self.malformed_rate = malformed_rate
+        self.random = random.Random(seed)
+        self.completions = 0
+        self.malformed = 0
+
+    def _words(self, count):
+        return ' '.join(self.random.choice(LOREM) for _ in range(count))
+
+    def _title(self, number):
+        return f"{number} Cozy Ideas to Refresh Your Home This Season (Number {number} Is a Must!)"
+
+    def answer(self, prompt, response_format, malformed):
+        """Texto da resposta para o prompt; malformed=True quebra as regras do pedido."""
+        if response_format and response_format.get('type') == 'json_schema':
+            fields = response_format['json_schema']['schema']['required']
+            match = re.search(r'exactly (\d+) items', prompt)
+            number = int(match.group(1)) if match else 5
+            doc = {
+                'title': self._title(number),
+                'main_description': "Fresh, simple ways to make every room feel warm and welcoming.",
+                'keywords': [self._words(2) for _ in range(6)],
+                'ideas': [
+                    {'number': i, 'idea': self._words(4).title(), 'description': self._words(50)}
+                    for i in range(1, number + 1)
+                ],
+            }
+            content = json.dumps({field: doc[field] for field in fields})
+            return content[:len(content) // 2] if malformed else content
+
+        match = re.search(r'idea number (\d+)', prompt)
+        if match:
+            if malformed:
+                return f"Idea: {self._words(4).title()}"
+            return f"Idea: {self._words(4).title()}\nDescription: {self._words(50)}"
+
+        match = re.search(r'starts with the number (\d+)', prompt)
+        if match:
+            title = self._title(int(match.group(1)))
+            return title + ' ' + self._words(30) if malformed else title
+
+        if 'keywords' in prompt:
+            return ', '.join(self._words(2) for _ in range(6))
+        if 'description' in prompt:
+            return self._words(40) if malformed else "Fresh, simple ways to make every room feel warm and welcoming."
+        return self._words(20)
+
+    def handle(self, method, path, query, body, headers):
+        if path != '/v1/chat/completions' or method != 'POST':
+            return 404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}}
+        if not headers.get('Authorization', '').startswith('Bearer '):
+            return 401, {'error': {'message': 'Incorrect API key provided', 'type': 'invalid_request_error'}}
+        data = json.loads(body or b'{}')
+        prompt = data['messages'][-1]['content']
+        with self.lock:
+            malformed = self.random.random() < self.malformed_rate
+            content = self.answer(prompt, data.get('response_format'), malformed)
+            self.completions += 1
+            self.malformed += malformed
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+        return 200, {
+            'id': f"chatcmpl-stub{self.completions}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': data.get('model'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        }
+
+
+class GetIMGStub(StubServer):
+    """
+    Imita POST /v1/flux-schnell/text-to-image com response_format=url e serve os JPEGs gerados.
+
+    A imagem de cada tamanho é criada uma vez (um fractal, que comprime como uma foto e não como
+    uma cor sólida) e reutilizada; a latência configurada simula o tempo de renderização.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        super().__init__(host, port, latency)
+        self.generated = 0
+        self._images = {}
+
+    def _jpeg(self, width, height):
+        if (width, height) not in self._images:
+            image = Image.effect_mandelbrot((width, height), (-2.0, -1.5, 1.0, 1.5), 64).convert('RGB')
+            buffer = io.BytesIO()
+            image.save(buffer, format='JPEG', quality=90)
+            self._images[(width, height)] = buffer.getvalue()
+        return self._images[(width, height)]
+
+    def handle(self, method, path, query, body, headers):
+        if method == 'POST' and path.endswith('/text-to-image'):
+            if not headers.get('Authorization', '').startswith('Bearer '):
+                return 401, {'error': {'message': 'Unauthorized'}}
+            data = json.loads(body or b'{}')
+            if not data.get('prompt'):
+                return 400, {'error': {'message': 'prompt is required'}}
+            with self.lock:
+                self.generated += 1
+                number = self.generated
+            width, height = int(data.get('width', 768)), int(data.get('height', 1280))
+            return 200, {'url': f"{self.url}/images/{width}x{height}/{number}.jpeg", 'cost': 0.0}
+        match = re.fullmatch(r'/images/(\d+)x(\d+)/\d+\.jpeg', path)
+        if method == 'GET' and match:
+            with self.lock:
+                return 200, self._jpeg(int(match.group(1)), int(match.group(2)))
+        return 404, {'error': {'message': 'Not found'}}
+
+
+logging.getLogger('stub_servers.sftp').addHandler(logging.NullHandler())
+logging.getLogger('stub_servers.sftp').propagate = False
+
+
+class _StubSSHServer(paramiko.ServerInterface):
+    def __init__(self, stub):
+        self.stub = stub
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if (username, password) == (self.stub.username, self.stub.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+
+class _StubSFTPHandle(paramiko.SFTPHandle):
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def chattr(self, attr):
+        return paramiko.SFTP_OK
+
+    def close(self):
+        super().close()
+        if self.writing:
+            with self.stub.lock:
+                self.stub.uploads.append((self.remote_path, self.filename.stat().st_size))
+
+
+class _StubSFTPInterface(paramiko.SFTPServerInterface):
+    """Operações SFTP sobre o diretório raiz do stub (caminhos remotos absolutos viram relativos a ele)."""
+
+    def __init__(self, server, stub, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.stub = stub
+
+    def _local(self, path):
+        return self.stub.root / os.path.normpath('/' + path).lstrip('/')
+
+    def _attributes(self, path, follow=True):
+        try:
+            local = self._local(path)
+            return paramiko.SFTPAttributes.from_stat(os.stat(local) if follow else os.lstat(local))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        return self._attributes(path)
+
+    def lstat(self, path):
+        return self._attributes(path, follow=False)
+
+    def list_folder(self, path):
+        try:
+            entries = []
+            for entry in self._local(path).iterdir():
+                attributes = paramiko.SFTPAttributes.from_stat(entry.stat())
+                attributes.filename = entry.name
+                entries.append(attributes)
+            return entries
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def open(self, path, flags, attr):
+        if self.stub.latency:
+            time.sleep(self.stub.latency)
+        local = self._local(path)
+        try:
+            if flags & os.O_CREAT:
+                # Servidor tolerante: cria os diretórios que faltarem
+                local.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(local, flags | getattr(os, 'O_BINARY', 0), 0o644)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        if flags & os.O_WRONLY:
+            mode = 'ab' if flags & os.O_APPEND else 'wb'
+        elif flags & os.O_RDWR:
+            mode = 'r+b'
+        else:
+            mode = 'rb'
+        handle = _StubSFTPHandle(flags)
+        handle.stub = self.stub
+        handle.filename = local
+        handle.remote_path = path
+        handle.writing = bool(flags & (os.O_WRONLY | os.O_RDWR))
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+    def mkdir(self, path, attr):
+        try:
+            self._local(path).mkdir()
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def remove(self, path):
+        try:
+            self._local(path).unlink()
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def rename(self, oldpath, newpath):
+        try:
+            self._local(oldpath).rename(self._local(newpath))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+
+class SFTPStub:
+    """
+    Servidor SSH/SFTP em processo (paramiko), com autenticação por senha, que grava os arquivos num
+    diretório local. `latency` atrasa cada abertura de arquivo; `uploads` registra (caminho, bytes).
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, root=None, username='stub', password='stub'):
+        self.latency = latency
+        self.username = username
+        self.password = password
+        self.root = Path(root or tempfile.mkdtemp(prefix='sftp-stub-'))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.uploads = []
+        self._host_key = paramiko.RSAKey.generate(2048)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, port))
+        self._socket.listen(16)
+        self._transports = []
+        self._thread = None
+
+    @property
+    def host(self):
+        return self._socket.getsockname()[0]
+
+    @property
+    def port(self):
+        return self._socket.getsockname()[1]
+
+    @property
+    def url(self):
+        return f"sftp://{self.username}:{self.password}@{self.host}:{self.port}"
+
+    def _serve(self):
+        while True:
+            try:
+                client, _ = self._socket.accept()
+            except OSError:
+                break
+            try:
+                transport = paramiko.Transport(client)
+                # Desconexões do cliente ao fim do benchmark não são erros do stub
+                transport.set_log_channel('stub_servers.sftp')
+                transport.add_server_key(self._host_key)
+                transport.set_subsystem_handler('sftp', paramiko.SFTPServer, _StubSFTPInterface, self)
+                transport.start_server(server=_StubSSHServer(self))
+                self._transports.append(transport)
+            except Exception as e:
+                print(f"SFTP stub: falha na negociação SSH: {e}")
+                client.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        for transport in self._transports:
+            transport.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+STUBS = {
+    'pinterest': PinterestAPIStub,
+    'django': DjangoAPIStub,
+    'openai': OpenAIStub,
+    'getimg': GetIMGStub,
+    'sftp': SFTPStub,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidores locais que imitam as APIs externas.")
+    parser.add_argument('stub', choices=sorted(STUBS))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Atraso em segundos por requisição")
+    args = parser.parse_args()
+
+    server = STUBS[args.stub](args.host, args.port, args.latency).start()
+    print(f"{args.stub} stub em {server.url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()